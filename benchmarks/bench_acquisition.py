@@ -0,0 +1,48 @@
+"""
+Measure the time the NumPy backend spends maximizing the acquisition
+function (the ``'suggest'`` phase of ``stats``, excluding the fit) on
+Hartmann-6, for different numbers of candidates and worker threads.
+
+Usage::
+
+    python benchmarks/bench_acquisition.py [n_trials] [repeats]
+"""
+import sys
+import multiprocessing
+import numpy as np
+import simple_spearmint
+from functions import get_benchmark
+
+
+def acquisition_time(grid_size, n_workers, n_trials, repeats):
+    np.random.seed(0)
+    benchmark = get_benchmark('hartmann6')
+    backend = simple_spearmint.NumpyBackend(n_workers=n_workers)
+    ss = simple_spearmint.SimpleSpearmint(
+        benchmark['parameter_space'], backend=backend,
+        options={'grid_size': grid_size})
+    for suggestion in ss.suggest_random(n_trials, method='sobol', seed=0):
+        ss.update(suggestion, benchmark['objective'](**suggestion))
+    times = []
+    with ss:
+        for _ in range(repeats + 1):
+            ss.suggest()
+            times.append(ss.stats.records[-1]['phases']['suggest'])
+    # The first suggestion also starts the thread pool
+    return np.median(times[1:])
+
+
+def main(n_trials=200, repeats=5):
+    print('{:>10} {:>8} {:>22}'.format(
+        'grid size', 'workers', 'acquisition time (s)'))
+    for grid_size in [2000, 20000, 200000]:
+        n_workers = 1
+        while n_workers <= multiprocessing.cpu_count():
+            print('{:>10} {:>8} {:>22.3f}'.format(
+                grid_size, n_workers, acquisition_time(
+                    grid_size, n_workers, n_trials, repeats)))
+            n_workers *= 2
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
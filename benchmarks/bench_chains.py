@@ -0,0 +1,55 @@
+"""
+Measure the wall-clock time of a full fit of the GP hyperparameters with the
+Spearmint backend, for different numbers of parallel MCMC chains drawing the
+same total number of samples.
+
+Usage::
+
+    python benchmarks/bench_chains.py [n_trials] [mcmc_iters] [repeats]
+
+The number of chains is doubled up to the number of CPUs.
+"""
+import sys
+import timeit
+import multiprocessing
+import numpy as np
+import simple_spearmint
+from functions import get_benchmark
+
+
+def fit_time(n_chains, n_trials, mcmc_iters, repeats):
+    benchmark = get_benchmark('hartmann6')
+    backend = simple_spearmint.SpearmintBackend(n_chains=n_chains)
+    ss = simple_spearmint.SimpleSpearmint(
+        benchmark['parameter_space'], backend=backend,
+        options={'mcmc_iters': mcmc_iters})
+    for suggestion in ss.suggest_random(n_trials, method='sobol', seed=0):
+        ss.update(suggestion, benchmark['objective'](**suggestion))
+    times = []
+    try:
+        with ss._quiet():
+            # The first fit also burns in the chains and starts the pool
+            ss._fit(True)
+            for _ in range(repeats):
+                tic = timeit.default_timer()
+                ss._fit(True)
+                times.append(timeit.default_timer() - tic)
+    finally:
+        ss.close()
+    return np.median(times)
+
+
+def main(n_trials=100, mcmc_iters=32, repeats=3):
+    print('{:>8} {:>14} {:>10}'.format('chains', 'fit time (s)', 'speedup'))
+    n_chains = 1
+    while n_chains <= multiprocessing.cpu_count():
+        elapsed = fit_time(n_chains, n_trials, mcmc_iters, repeats)
+        if n_chains == 1:
+            baseline = elapsed
+        print('{:>8} {:>14.3f} {:>10.2f}'.format(
+            n_chains, elapsed, baseline/elapsed))
+        n_chains *= 2
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,54 @@
+"""
+Measure the start-up cost of ``SimpleSpearmint`` with each backend: the time
+to import ``simple_spearmint``, and the time until the first model-based
+suggestion is made, which is when the Spearmint backend imports Spearmint.
+Each measurement runs in a fresh interpreter.
+
+Usage::
+
+    python benchmarks/bench_import.py [repeats]
+"""
+import sys
+import subprocess
+import numpy as np
+
+SCRIPT = '''
+import sys
+import timeit
+tic = timeit.default_timer()
+import simple_spearmint
+imported = timeit.default_timer()
+ss = simple_spearmint.SimpleSpearmint(
+    {'x': {'type': 'float', 'min': -2, 'max': 2}}, backend='{backend}')
+for suggestion in ss.suggest_random(3, seed=0):
+    ss.update(suggestion, suggestion['x']**2)
+ss.suggest()
+suggested = timeit.default_timer()
+print(imported - tic, suggested - tic, 'spearmint' in sys.modules)
+'''
+
+
+def main(repeats=5):
+    print('{:>10} {:>12} {:>20} {:>10}'.format(
+        'backend', 'import (s)', 'first suggest (s)', 'spearmint'))
+    for backend in ['numpy', 'spearmint']:
+        times = []
+        for _ in range(repeats):
+            try:
+                output = subprocess.check_output(
+                    [sys.executable, '-c',
+                     SCRIPT.replace('{backend}', backend)],
+                    stderr=subprocess.STDOUT)
+            except subprocess.CalledProcessError:
+                print('{:>10} {:>12}'.format(backend, 'failed'))
+                break
+            import_time, suggest_time, loaded = output.split()[-3:]
+            times.append((float(import_time), float(suggest_time)))
+        else:
+            import_time, suggest_time = np.median(times, axis=0)
+            print('{:>10} {:>12.3f} {:>20.3f} {:>10}'.format(
+                backend, import_time, suggest_time, loaded.decode()))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,45 @@
+"""
+Compare the suggestion latency and solution quality of the chooser presets
+on the Branin function, whose global minimum is 0.397887.
+
+Usage::
+
+    python benchmarks/bench_presets.py [n_trials] [n_repeats]
+"""
+import sys
+import timeit
+import numpy as np
+import simple_spearmint
+
+
+def branin(x, y):
+    return ((y - 5.1/(4*np.pi**2)*x**2 + 5/np.pi*x - 6)**2
+            + 10*(1 - 1/(8*np.pi))*np.cos(x) + 10)
+
+
+def run(preset, n_trials, seed):
+    np.random.seed(seed)
+    ss = simple_spearmint.SimpleSpearmint(
+        {'x': {'type': 'float', 'min': -5, 'max': 10},
+         'y': {'type': 'float', 'min': 0, 'max': 15}}, preset=preset)
+    latencies = []
+    for n in range(n_trials):
+        tic = timeit.default_timer()
+        suggestion = ss.suggest()
+        latencies.append(timeit.default_timer() - tic)
+        ss.update(suggestion, branin(**suggestion))
+    return np.mean(latencies), ss.get_best_parameters()[1] - 0.397887
+
+
+def main(n_trials=40, n_repeats=3):
+    print('{:>10} {:>22} {:>16}'.format(
+        'preset', 'mean suggest time (s)', 'median regret'))
+    for preset in ['fast', 'balanced', 'thorough', 'adaptive']:
+        results = np.array([run(preset, n_trials, seed)
+                            for seed in range(n_repeats)])
+        print('{:>10} {:>22.3f} {:>16.4f}'.format(
+            preset, results[:, 0].mean(), np.median(results[:, 1])))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,47 @@
+"""
+Measure the per-trial cost of ``SimpleSpearmint.update`` as the number of
+trials grows, and of bringing Spearmint's task group up to date with the new
+trials, which the next fit does first.  With the array-backed trial stores
+and incremental vectorization, both should stay roughly flat rather than
+growing linearly with the number of trials.
+
+Usage::
+
+    python benchmarks/bench_update.py [n_trials] [block_size]
+"""
+import sys
+import timeit
+import numpy as np
+import simple_spearmint
+
+
+def main(n_trials=5000, block_size=500):
+    parameter_space = {'x': {'type': 'float', 'min': -2, 'max': 2},
+                       'y': {'type': 'int', 'min': 0, 'max': 10},
+                       'function': {'type': 'enum',
+                                    'options': ['sin', 'cos', 'tan']}}
+    ss = simple_spearmint.SimpleSpearmint(parameter_space)
+    # Pre-generate the trials so that only update() is timed
+    suggestions = [ss.suggest_random() for _ in range(n_trials)]
+    values = np.random.randn(n_trials)
+    # Import Spearmint and create the task group before timing
+    ss.backend.task_group(ss)
+    print('{:>10} {:>20} {:>24}'.format(
+        'trials', 'usec per update', 'usec per trial to sync'))
+    for start in range(0, n_trials, block_size):
+        end = min(start + block_size, n_trials)
+        tic = timeit.default_timer()
+        for n in range(start, end):
+            ss.update(suggestions[n], values[n])
+        update_time = timeit.default_timer() - tic
+        # The first call after the updates vectorizes the block's trials
+        tic = timeit.default_timer()
+        ss.backend.task_group(ss)
+        sync_time = timeit.default_timer() - tic
+        print('{:>10} {:>20.1f} {:>24.1f}'.format(
+            end, 1e6*update_time/(end - start),
+            1e6*sync_time/(end - start)))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,56 @@
+"""
+Measure how long it takes to warm-start an optimizer with historical trials
+using ``SimpleSpearmint.update_many``, from a list of dicts, from column
+arrays, and from .npz and .csv files.
+
+Usage::
+
+    python benchmarks/bench_update_many.py [n_trials]
+"""
+import os
+import sys
+import shutil
+import tempfile
+import timeit
+import numpy as np
+import simple_spearmint
+
+
+def parameter_space():
+    return {'x': {'type': 'float', 'min': -2, 'max': 2},
+            'y': {'type': 'int', 'min': 0, 'max': 10},
+            'function': {'type': 'enum', 'options': ['sin', 'cos', 'tan']}}
+
+
+def main(n_trials=10000):
+    trials = simple_spearmint.SimpleSpearmint(
+        parameter_space()).suggest_random(n_trials)
+    values = np.random.randn(n_trials)
+    columns = dict((name, np.array([trial[name] for trial in trials]))
+                   for name in parameter_space())
+    directory = tempfile.mkdtemp()
+    try:
+        npz_path = os.path.join(directory, 'trials.npz')
+        np.savez(npz_path, objective=values, **columns)
+        csv_path = os.path.join(directory, 'trials.csv')
+        with open(csv_path, 'w') as f:
+            f.write('x,y,function,objective\n')
+            for trial, value in zip(trials, values):
+                f.write('{!r},{},{},{!r}\n'.format(
+                    trial['x'], trial['y'], trial['function'], float(value)))
+        sources = [('list of dicts', trials, values),
+                   ('column arrays', columns, values),
+                   ('.npz file', npz_path, None),
+                   ('.csv file', csv_path, None)]
+        for name, parameter_values, objective_values in sources:
+            ss = simple_spearmint.SimpleSpearmint(parameter_space())
+            tic = timeit.default_timer()
+            ss.update_many(parameter_values, objective_values)
+            print('{:>15}: {} trials in {:.3f}s'.format(
+                name, n_trials, timeit.default_timer() - tic))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
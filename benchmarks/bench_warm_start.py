@@ -0,0 +1,82 @@
+"""
+Compare cold-started studies with studies warm-started from a prior study of
+a related objective (see ``SimpleSpearmint.warm_start``), as when the same
+model is re-tuned on fresh data.  The prior study optimizes a Hartmann
+function; the new studies optimize a drifted version, whose optimum is moved
+by ``drift`` in every coordinate and whose values are scaled and shifted.
+
+For each way of warm-starting, the script reports the median number of
+trials the new study needs to get as close to its optimum as the prior study
+got to its own in ``n_trials`` trials (capped at ``n_trials``), and the
+median regret after 10 and after ``n_trials`` trials.  Studies which don't
+start from prior configurations or observations start from the same initial
+design as the cold studies.
+
+Usage::
+
+    python benchmarks/bench_warm_start.py [function] [n_trials] [repeats]
+"""
+import sys
+import numpy as np
+import simple_spearmint
+from functions import get_benchmark
+
+# Keyword arguments of warm_start for each strategy
+STRATEGIES = [('cold', None),
+              ('hypers', {'hypers': True}),
+              ('top_k', {'top_k': 5}),
+              ('observations', {'observations': True}),
+              ('all', {'top_k': 5, 'observations': True})]
+
+
+def run(name, strategy, n_trials, seed, drift=.03):
+    benchmark = get_benchmark(name)
+    objective = benchmark['objective']
+
+    def drifted(**parameters):
+        shifted = dict((key, value - drift)
+                       for key, value in parameters.items())
+        return 2.*objective(**shifted) + 1.
+    optimum = 2.*benchmark['optimum'] + 1.
+    np.random.seed(seed)
+    prior = simple_spearmint.SimpleSpearmint(benchmark['parameter_space'],
+                                             backend='numpy')
+    for suggestion in prior.suggest_random(5, method='sobol', seed=seed):
+        prior.update(suggestion, objective(**suggestion))
+    for _ in range(n_trials - 5):
+        suggestion = prior.suggest()
+        prior.update(suggestion, objective(**suggestion))
+    # The regret the prior study achieved, in the units of the new one
+    target = 2.*(prior.get_best_parameters()[1] - benchmark['optimum'])
+    ss = simple_spearmint.SimpleSpearmint(benchmark['parameter_space'],
+                                          backend='numpy')
+    n_initial = 0
+    if strategy is not None:
+        ss.warm_start(prior, **strategy)
+    if not (ss.queued_values or ss.auxiliary):
+        n_initial = 5
+        for suggestion in ss.suggest_random(n_initial, method='sobol',
+                                            seed=seed + 1):
+            ss.update(suggestion, drifted(**suggestion))
+    for _ in range(n_trials - n_initial):
+        suggestion = ss.suggest()
+        ss.update(suggestion, drifted(**suggestion))
+    regret = ss.history.regret(optimum)
+    reached = np.flatnonzero(regret <= target)
+    return (reached[0] + 1 if reached.size else n_trials, regret[9],
+            regret[-1])
+
+
+def main(name='hartmann6', n_trials=50, repeats=5):
+    print('{:>14} {:>24} {:>12} {:>14}'.format(
+        'strategy', 'trials to prior regret', 'regret@10', 'final regret'))
+    for label, strategy in STRATEGIES:
+        results = np.array([run(name, strategy, n_trials, seed)
+                            for seed in range(repeats)])
+        print('{:>14} {:>24.1f} {:>12.4f} {:>14.4f}'.format(
+            label, *np.median(results, axis=0)))
+
+
+if __name__ == '__main__':
+    main(*[arg if i == 0 else int(arg)
+           for i, arg in enumerate(sys.argv[1:])])
@@ -0,0 +1,74 @@
+"""
+Compare two results files written by ``suite.py``, e.g. for the previous and
+the current version.  For each benchmark, the median ``suggest`` and
+``update`` time, the maximum peak RSS and the mean final regret are shown for
+both, and the script exits with status 1 if any of them got worse by more than
+the tolerance.
+
+Usage::
+
+    python benchmarks/compare.py old_results.json new_results.json
+"""
+import sys
+import json
+import argparse
+import collections
+import numpy as np
+
+
+def summarize(path):
+    """ Aggregate the runs of a results file by benchmark and trial count.
+
+    Returns
+    -------
+    summary : dict
+        Dictionary mapping ``'benchmark/n_trials'`` to a dict of metrics.
+    """
+    with open(path) as f:
+        results = json.load(f)['results']
+    runs = collections.defaultdict(list)
+    for result in results:
+        runs['{}/{}'.format(result['benchmark'], result['n_trials'])].append(
+            result)
+    summary = {}
+    for key, results in runs.items():
+        summary[key] = {
+            'suggest_time': np.median(sum(
+                [result['suggest_time'] for result in results], [])),
+            'update_time': np.median(sum(
+                [result['update_time'] for result in results], [])),
+            'peak_rss_mb': max(result['peak_rss_mb'] for result in results),
+            'final_regret': np.mean(
+                [result['regret'][-1] for result in results])}
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('old', help='Baseline results file.')
+    parser.add_argument('new', help='Results file to compare to it.')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed relative increase of each metric.')
+    args = parser.parse_args(argv)
+
+    old, new = summarize(args.old), summarize(args.new)
+    regressions = 0
+    print('{:<22} {:<14} {:>12} {:>12} {:>8}'.format(
+        'benchmark', 'metric', 'old', 'new', 'ratio'))
+    for key in sorted(set(old) & set(new)):
+        for metric in ['suggest_time', 'update_time', 'peak_rss_mb',
+                       'final_regret']:
+            ratio = new[key][metric]/old[key][metric]
+            # Regret can legitimately reach 0, so also allow a small absolute
+            # difference
+            regressed = (ratio > 1 + args.tolerance and
+                         new[key][metric] - old[key][metric] > 1e-6)
+            regressions += regressed
+            print('{:<22} {:<14} {:>12.4g} {:>12.4g} {:>8.2f}{}'.format(
+                key, metric, old[key][metric], new[key][metric], ratio,
+                ' REGRESSION' if regressed else ''))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
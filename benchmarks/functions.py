@@ -0,0 +1,117 @@
+"""
+Standard test functions for benchmarking ``SimpleSpearmint``.  Each benchmark
+is a dict with a ``parameter_space``, an ``objective`` which is called as
+``objective(**parameters)`` and is to be minimized, and the known ``optimum``
+value of the objective.
+"""
+import numpy as np
+
+
+def branin(x, y):
+    return ((y - 5.1/(4*np.pi**2)*x**2 + 5/np.pi*x - 6)**2
+            + 10*(1 - 1/(8*np.pi))*np.cos(x) + 10)
+
+
+HARTMANN3_ALPHA = np.array([1.0, 1.2, 3.0, 3.2])
+HARTMANN3_A = np.array([[3., 10, 30],
+                        [0.1, 10, 35],
+                        [3., 10, 30],
+                        [0.1, 10, 35]])
+HARTMANN3_P = 1e-4*np.array([[3689, 1170, 2673],
+                             [4699, 4387, 7470],
+                             [1091, 8732, 5547],
+                             [381, 5743, 8828]])
+
+HARTMANN6_ALPHA = HARTMANN3_ALPHA
+HARTMANN6_A = np.array([[10, 3, 17, 3.5, 1.7, 8],
+                        [0.05, 10, 17, 0.1, 8, 14],
+                        [3, 3.5, 1.7, 10, 17, 8],
+                        [17, 8, 0.05, 10, 0.1, 14]])
+HARTMANN6_P = 1e-4*np.array([[1312, 1696, 5569, 124, 8283, 5886],
+                             [2329, 4135, 8307, 3736, 1004, 9991],
+                             [2348, 1451, 3522, 2883, 3047, 6650],
+                             [4047, 8828, 8732, 5743, 1091, 381]])
+
+
+def _hartmann(x, alpha, A, P):
+    return -np.sum(alpha*np.exp(-np.sum(A*(x - P)**2, axis=1)))
+
+
+def hartmann3(**parameters):
+    x = np.array([parameters['x{}'.format(i)] for i in range(3)])
+    return _hartmann(x, HARTMANN3_ALPHA, HARTMANN3_A, HARTMANN3_P)
+
+
+def hartmann6(**parameters):
+    x = np.array([parameters['x{}'.format(i)] for i in range(6)])
+    return _hartmann(x, HARTMANN6_ALPHA, HARTMANN6_A, HARTMANN6_P)
+
+
+def rosenbrock(**parameters):
+    x = np.array([parameters['x{}'.format(i)]
+                  for i in range(len(parameters))])
+    return np.sum(100*(x[1:] - x[:-1]**2)**2 + (1 - x[:-1])**2)
+
+
+ACTIVATION_PENALTY = {'relu': 0., 'tanh': .5, 'sigmoid': 1.}
+
+
+def mixed(x, n, activation):
+    """ Function of a float, an int and an enum parameter. """
+    return ((x - 1)**2 + np.sin(3*x)**2 + (n - 3)**2/4.
+            + ACTIVATION_PENALTY[activation])
+
+
+def _unit_cube(num_dims):
+    return dict(('x{}'.format(i), {'type': 'float', 'min': 0, 'max': 1})
+                for i in range(num_dims))
+
+
+def get_benchmark(name):
+    """ Create a benchmark by name.
+
+    Parameters
+    ----------
+    name : str
+        One of ``'branin'``, ``'hartmann3'``, ``'hartmann6'``, ``'mixed'`` or
+        ``'rosenbrockD'``, where ``D`` is the number of dimensions.
+
+    Returns
+    -------
+    benchmark : dict
+        Dictionary with keys ``'parameter_space'``, ``'objective'`` and
+        ``'optimum'``.
+    """
+    if name == 'branin':
+        return {'parameter_space': {'x': {'type': 'float', 'min': -5,
+                                          'max': 10},
+                                    'y': {'type': 'float', 'min': 0,
+                                          'max': 15}},
+                'objective': branin,
+                'optimum': 0.397887}
+    elif name == 'hartmann3':
+        return {'parameter_space': _unit_cube(3),
+                'objective': hartmann3,
+                'optimum': -3.86278}
+    elif name == 'hartmann6':
+        return {'parameter_space': _unit_cube(6),
+                'objective': hartmann6,
+                'optimum': -3.32237}
+    elif name == 'mixed':
+        return {'parameter_space': {
+                    'x': {'type': 'float', 'min': -3, 'max': 3},
+                    'n': {'type': 'int', 'min': 0, 'max': 10},
+                    'activation': {'type': 'enum',
+                                   'options': ['relu', 'tanh', 'sigmoid']}},
+                'objective': mixed,
+                'optimum': 0.}
+    elif name.startswith('rosenbrock'):
+        num_dims = int(name[len('rosenbrock'):])
+        return {'parameter_space': dict(
+                    ('x{}'.format(i), {'type': 'float', 'min': -2.048,
+                                       'max': 2.048})
+                    for i in range(num_dims)),
+                'objective': rosenbrock,
+                'optimum': 0.}
+    else:
+        raise ValueError('Unknown benchmark {}.'.format(name))
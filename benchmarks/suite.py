@@ -0,0 +1,126 @@
+"""
+Benchmark suite for ``SimpleSpearmint``.  Each benchmark function is
+optimized for a number of trials, repeated with different seeds, and the wall
+time of every ``update`` and ``suggest`` call, the peak resident set size and
+the regret (best objective value found so far minus the optimum) after every
+trial are written to a JSON file.  Each run happens in a fresh process, so
+that peak memory usage is measured per run.  Use ``compare.py`` to compare the
+results of two versions.
+
+Everything runs offline on the CPU.
+
+Usage::
+
+    python benchmarks/suite.py --benchmarks branin hartmann3 mixed \\
+        --n-trials 50 --repeats 3 --output results.json
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import multiprocessing
+import numpy as np
+import simple_spearmint
+from functions import get_benchmark
+
+
+def run(benchmark_name, n_trials, n_initial, seed, kwargs):
+    """ Run one benchmark in the current process.
+
+    Returns
+    -------
+    result : dict
+        Timings, peak memory and regret curve of this run.
+    """
+    np.random.seed(seed)
+    benchmark = get_benchmark(benchmark_name)
+    ss = simple_spearmint.SimpleSpearmint(
+        benchmark['parameter_space'], **kwargs)
+    best = np.inf
+    regret = []
+    for n in range(n_trials):
+        if n < n_initial:
+            suggestion = ss.suggest_random()
+        else:
+            suggestion = ss.suggest()
+        value = float(benchmark['objective'](**suggestion))
+        ss.update(suggestion, value)
+        best = min(best, value)
+        regret.append(best - benchmark['optimum'])
+    durations = dict((call, []) for call in ['suggest', 'update'])
+    for record in ss.stats.records:
+        durations[record['call']].append(record['duration'])
+    return {'benchmark': benchmark_name,
+            'n_trials': n_trials,
+            'num_dims': ss.num_dims,
+            'seed': seed,
+            'suggest_time': durations['suggest'],
+            'update_time': durations['update'],
+            # ru_maxrss is in kilobytes on Linux
+            'peak_rss_mb': resource.getrusage(
+                resource.RUSAGE_SELF).ru_maxrss/1024.,
+            'regret': regret}
+
+
+def _run(args):
+    return run(*args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--benchmarks', nargs='+',
+                        default=['branin', 'hartmann3', 'hartmann6',
+                                 'rosenbrock2', 'rosenbrock4', 'mixed'],
+                        help='Benchmarks to run; rosenbrockD has D dims.')
+    parser.add_argument('--n-trials', type=int, nargs='+', default=[50],
+                        help='Number of trials for each run.')
+    parser.add_argument('--n-initial', type=int, default=5,
+                        help='Number of initial random trials.')
+    parser.add_argument('--repeats', type=int, default=3,
+                        help='Number of seeds per benchmark.')
+    parser.add_argument('--preset', default=None,
+                        help='Chooser preset, see simple_spearmint.PRESETS.')
+    parser.add_argument('--backend', default='spearmint',
+                        help='Backend, see simple_spearmint.backends.')
+    parser.add_argument('--max-fit-trials', type=int, default=None,
+                        help='Maximum number of trials to fit the model to.')
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help='Path of the JSON results file.')
+    args = parser.parse_args(argv)
+
+    kwargs = {'preset': args.preset, 'max_fit_trials': args.max_fit_trials,
+              'backend': args.backend}
+    jobs = [(name, n_trials, args.n_initial, seed, kwargs)
+            for name in args.benchmarks
+            for n_trials in args.n_trials
+            for seed in range(args.repeats)]
+    results = []
+    # A fresh process per run, so that the peak RSS is per run
+    pool = multiprocessing.Pool(1, maxtasksperchild=1)
+    try:
+        for result in pool.imap(_run, jobs):
+            print('{} ({} trials, seed {}): final regret {:.4g}, median '
+                  'suggest {:.3f}s, peak RSS {:.0f}MB'.format(
+                      result['benchmark'], result['n_trials'], result['seed'],
+                      result['regret'][-1],
+                      np.median(result['suggest_time'] or [np.nan]),
+                      result['peak_rss_mb']))
+            results.append(result)
+    finally:
+        pool.close()
+        pool.join()
+
+    with open(args.output, 'w') as f:
+        json.dump({'time': time.time(),
+                   'python': platform.python_version(),
+                   'numpy': np.__version__,
+                   'machine': platform.machine(),
+                   'processor': platform.processor(),
+                   'settings': vars(args),
+                   'results': results}, f)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -23,5 +23,6 @@ setup(
     install_requires=[
         'spearmint',
         'numpy',
+        'futures; python_version < "3"',
     ],
 )
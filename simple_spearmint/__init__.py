@@ -1 +1,12 @@
 from .simple_spearmint import *
+from .refit import *
+from .presets import *
+from .stats import *
+from .manager import *
+from .client import *
+from .filequeue import *
+from .backends import *
+from .cache import *
+from .evaluation import *
+from .hyperband import *
+from .history import *
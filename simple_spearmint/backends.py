@@ -0,0 +1,811 @@
+import numpy as np
+import concurrent.futures
+from .trials import TrialStore
+from .presets import CHOOSER_OPTIONS, MODEL_OPTIONS
+
+
+class Backend(object):
+    """ Interface of the models which make suggestions for a
+    ``SimpleSpearmint`` object.
+
+    A backend fits a model to the optimizer's trials, which are stored in
+    ``optimizer.trials`` as encoded parameter values (see
+    ``SimpleSpearmint._encode_columns``), and to its pending trials, and then
+    suggests where to evaluate next.  Backends only hold state which can be
+    rebuilt from the optimizer, which they should leave out when they are
+    copied, e.g. by ``SimpleSpearmint.suggest_async``.
+
+    Backends which set ``supports_auxiliary`` also fit their model to the
+    down-weighted observations of prior studies in ``optimizer.auxiliary``
+    (see ``SimpleSpearmint.warm_start``).
+    """
+
+    supports_auxiliary = False
+
+    def fit(self, optimizer, indices, fit_hypers):
+        """ Fit the model to the optimizer's trials and pending trials.
+
+        Parameters
+        ----------
+        optimizer : SimpleSpearmint
+            The optimizer whose trials to fit.
+
+        indices : np.ndarray or None
+            Indices of the trials to fit, or None for all of them.
+
+        fit_hypers : bool
+            Whether to fit the model hyperparameters, or to reuse
+            ``optimizer.hypers``.
+
+        Returns
+        -------
+        hypers
+            Picklable model hyperparameters.
+        """
+        raise NotImplementedError()
+
+    def suggest(self, optimizer):
+        """ Suggest parameter values using the model from the last ``fit``.
+
+        Returns
+        -------
+        suggestion : dict
+            Dictionary mapping parameter names to the suggested values.
+        """
+        raise NotImplementedError()
+
+    def predict(self, optimizer, codes):
+        """ Predict the objective at encoded parameter values with the model
+        from the last ``fit``.
+
+        Returns
+        -------
+        mean, variance : np.ndarray or None
+            Predictive mean and variance (including noise) of the objective,
+            or None if there is no fitted model.
+        """
+        raise NotImplementedError()
+
+    def transfer_hypers(self, hypers, parameter_space, optimizer):
+        """ Map hyperparameters which a backend of this class fit to a study
+        over ``parameter_space`` to the parameter space of ``optimizer``, for
+        ``SimpleSpearmint.warm_start``.  By default, they are only reused if
+        the parameter spaces are identical, including the order of the
+        parameters.
+
+        Returns
+        -------
+        hypers
+            The mapped hyperparameters, or None if they can't be mapped.
+        """
+        if (list(parameter_space.items()) !=
+                list(optimizer.parameter_space.items())):
+            return None
+        return hypers
+
+    def close(self):
+        """ Shut down the worker pools the backend created, if any.  The
+        backend can still be used, and creates them again when needed. """
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SpearmintBackend(Backend):
+    """ Backend which uses Spearmint's default chooser and GP models.
+    Spearmint is imported on the first fit, or when ``task_group`` or
+    ``chooser`` are first accessed.
+
+    Spearmint works with vectorized parameter values (see
+    ``spearmint.tasks.TaskGroup.vectorify``).  The trials are vectorized
+    incrementally, so each fit only has to vectorize the trials which were
+    added since the last one.
+
+    Parameters
+    ----------
+    n_chains : int
+        Number of independent MCMC chains over the GP hyperparameters.  When
+        greater than one, each chain draws ``mcmc_iters/n_chains`` samples
+        in its own process, all starting from the current hyperparameters,
+        and the GPs average over the samples of all chains, so the fit takes
+        about ``1/n_chains`` of the time for the same number of samples.
+        Fits which reuse the hyperparameters (see ``RefitPolicy``) don't
+        sample and stay in the calling process, and copies of the backend,
+        e.g. those made by ``SimpleSpearmint.suggest_async``, sample a single
+        chain.
+
+    executor : concurrent.futures.Executor
+        Executor to run the chains on.  By default, a
+        ``concurrent.futures.ProcessPoolExecutor`` with ``n_chains`` processes
+        is created on the first fit, and shut down by ``close``.
+
+    """
+
+    def __init__(self, n_chains=1, executor=None):
+        self.n_chains = n_chains
+        self.executor = executor
+        # Whether the executor was created by the backend, which then shuts
+        # it down in close
+        self._own_executor = False
+        self._task_group = None
+        self._chooser = None
+        self._chooser_options = None
+        # Vectorized trials, and the offset and basis of the vectorization
+        self._inputs = None
+        self._vectorify_basis = None
+
+    def __getstate__(self):
+        # Spearmint's task group and chooser are rebuilt rather than copied,
+        # and copies, e.g. those which sample the chains, use a single chain
+        state = dict.fromkeys(self.__dict__)
+        state['n_chains'] = 1
+        return state
+
+    def task_group(self, optimizer, indices=None):
+        """ Get Spearmint's task group, pointed at the optimizer's trials and
+        pending trials.
+
+        Parameters
+        ----------
+        optimizer : SimpleSpearmint
+            The optimizer.
+
+        indices : np.ndarray
+            If given, only the trials with these indices are used.
+
+        Returns
+        -------
+        task_group : spearmint.tasks.task_group.TaskGroup
+            The task group.
+        """
+        if self._task_group is None:
+            import spearmint.tasks.task_group
+            self._task_group = spearmint.tasks.task_group.TaskGroup(
+                optimizer.task_config, optimizer.parameter_space)
+            self._inputs = TrialStore(self._task_group.num_dims)
+        trials = optimizer.trials
+        # Only vectorize the trials which were added since the last call
+        if len(self._inputs) < len(trials):
+            new_codes = trials.inputs[len(self._inputs):]
+            self._inputs.extend(self._vectorify_codes(optimizer, new_codes),
+                                trials.values[len(self._inputs):])
+        inputs, values, valid = (self._inputs.inputs, trials.values,
+                                 trials.valid)
+        if indices is not None:
+            inputs, values, valid = (inputs[indices], values[indices],
+                                     valid[indices])
+        # Update the task group with these parameter settings
+        self._task_group.inputs = inputs
+        # Update the task group with the objective value
+        self._task_group.values = {
+            'main': values,
+            # For some reason, the NaN task gets True values for non-NaN values
+            # See spearmint.tasks.TaskGroup.add_nan_task_if_nans
+            'NaN': valid}
+        self._task_group.pending = self._vectorify_codes(
+            optimizer, optimizer._encode_values(optimizer.pending_values))
+        return self._task_group
+
+    def chooser(self, optimizer):
+        """ Get Spearmint's default chooser, (re)created whenever the
+        optimizer's chooser options change. """
+        if (self._chooser is None or
+                optimizer.chooser_options != self._chooser_options):
+            import spearmint.choosers.default_chooser
+            self._chooser_options = dict(optimizer.chooser_options)
+            self._chooser = spearmint.choosers.default_chooser.init(
+                self._chooser_options)
+        return self._chooser
+
+    def _vectorify_codes(self, optimizer, codes):
+        """ Vectorize encoded parameter values in bulk, producing the same
+        rows as ``task_group.vectorify``.
+
+        Spearmint's vectorization is affine in int and float values, and
+        maps each enum option to a fixed pattern (its one-hot encoding).  So,
+        we probe ``task_group.vectorify`` once per parameter and per enum
+        option, and then vectorize any number of trials with array operations.
+        """
+        parameter_space = optimizer.parameter_space
+        if self._vectorify_basis is None:
+            names = list(parameter_space.keys())
+            # Reference setting: numeric parameters at their minimum, enums
+            # at their first option
+            reference = dict(
+                (name, spec['options'][0] if spec['type'] == 'enum'
+                 else spec['min'])
+                for name, spec in parameter_space.items())
+
+            def vectorify(name, value):
+                values = dict(reference)
+                values[name] = value
+                return self._task_group.vectorify(
+                    optimizer.spec_parameter_values(values))
+
+            offset = vectorify(names[0], reference[names[0]])
+            basis = []
+            for name in names:
+                spec = parameter_space[name]
+                if spec['type'] == 'enum':
+                    # Contribution of each option, relative to the reference
+                    basis.append(np.array(
+                        [vectorify(name, option) - offset
+                         for option in spec['options']]))
+                elif spec['max'] > spec['min']:
+                    # Contribution per unit increase of the value
+                    basis.append((vectorify(name, spec['max']) - offset)
+                                 / float(spec['max'] - spec['min']))
+                else:
+                    basis.append(np.zeros(offset.shape))
+            self._vectorify_basis = (offset, basis)
+        offset, basis = self._vectorify_basis
+        inputs = np.tile(offset, (codes.shape[0], 1))
+        for i, name in enumerate(parameter_space):
+            spec = parameter_space[name]
+            if spec['type'] == 'enum':
+                inputs += basis[i][codes[:, i].astype(int)]
+            else:
+                inputs += np.outer(codes[:, i] - spec['min'], basis[i])
+        return inputs
+
+    def fit(self, optimizer, indices, fit_hypers):
+        task_config = optimizer.task_config
+        if not fit_hypers:
+            # Spearmint's GP skips MCMC over the hyperparameters when
+            # mcmc_iters is 0, and just conditions on the supplied hypers
+            task_config = dict((name, dict(options, mcmc_iters=0))
+                               for name, options in task_config.items())
+        optimizer.stats.count('mcmc_iters', task_config['main'].get(
+            'mcmc_iters', MODEL_OPTIONS['mcmc_iters']))
+        with optimizer.stats.phase('task_group'):
+            task_group = self.task_group(optimizer, indices)
+        chooser = self.chooser(optimizer)
+        if fit_hypers and self.n_chains > 1:
+            return self._fit_chains(optimizer, indices, task_config)
+        with optimizer.stats.phase('fit'):
+            return chooser.fit(task_group, optimizer.hypers, task_config)
+
+    def _fit_chains(self, optimizer, indices, task_config):
+        """ Sample ``n_chains`` MCMC chains in parallel, then condition the
+        chooser's GPs on the hyperparameters at the end of the first chain
+        and give them the samples of all chains.
+
+        This relies on the internals of ``spearmint.models.gp.GP``, which
+        keeps its hyperparameter samples in ``_hypers_list`` and their number
+        in ``num_states``, which the acquisition function averages over, the
+        pending trials it was fit to in ``pending`` and, for each sample,
+        fantasized values of the pending trials and Cholesky factors in
+        ``_fantasy_values_list`` and ``_cache_list``.  A ``RuntimeError`` is
+        raised if the GP doesn't have these attributes.
+        """
+        if self.executor is None:
+            self.executor = concurrent.futures.ProcessPoolExecutor(
+                self.n_chains)
+            self._own_executor = True
+        # Split the samples between the chains
+        chain_config = {}
+        for name, options in task_config.items():
+            mcmc_iters = options.get('mcmc_iters',
+                                     MODEL_OPTIONS['mcmc_iters'])
+            chain_config[name] = dict(options, mcmc_iters=int(np.ceil(
+                mcmc_iters/float(self.n_chains))))
+        optimizer.stats.set('n_chains', self.n_chains)
+        with optimizer.stats.phase('chains'):
+            seeds = np.random.randint(2**31, size=self.n_chains)
+            futures = [self.executor.submit(_sample_chain, optimizer, indices,
+                                            chain_config, seed)
+                       for seed in seeds]
+            chains = [future.result() for future in futures]
+        with optimizer.stats.phase('fit'):
+            # Only condition on the first chain's hyperparameters
+            no_mcmc = dict((name, dict(options, mcmc_iters=0))
+                           for name, options in task_config.items())
+            hypers = self._chooser.fit(self._task_group, chains[0][0],
+                                       no_mcmc)
+            for name, model in self._chooser.models.items():
+                if not (hasattr(model, 'pending') and
+                        hasattr(model, 'num_states')):
+                    # Otherwise, the merged samples would silently lack their
+                    # fantasies or not all be averaged over
+                    raise RuntimeError(
+                        'Parallel chains are not supported by this version '
+                        'of Spearmint, whose GP has no pending or num_states '
+                        'attribute.')
+                model._hypers_list = [sample for _, samples in chains
+                                      for sample in samples[name]]
+                model.num_states = len(model._hypers_list)
+                if model.pending is not None:
+                    model._fantasy_values_list = model._collect_fantasies(
+                        model.pending)
+                model._prepare_cache()
+                model.set_state(len(model._hypers_list) - 1)
+        return hypers
+
+    def close(self):
+        if self._own_executor:
+            self.executor.shutdown()
+            self.executor = None
+            self._own_executor = False
+
+    def suggest(self, optimizer):
+        with optimizer.stats.phase('suggest'):
+            suggestion = self._chooser.suggest()
+        optimizer.stats.count('grid_size', optimizer.chooser_options.get(
+            'grid_size', CHOOSER_OPTIONS['grid_size']))
+        with optimizer.stats.phase('paramify'):
+            return self._paramify(optimizer, suggestion)
+
+    def _paramify(self, optimizer, suggestion):
+        """ Convert a vector returned by ``chooser.suggest()`` to a dict
+        mapping parameter names to values. """
+        # Convert the vector format returned by chooser.suggest() to a dict
+        suggestion = self._task_group.paramify(np.atleast_1d(suggestion))
+        # Retrieve the values, and also flatten the 1d arrays that spearmint
+        # forces you to use
+        suggestion = dict((name, value['values'][0])
+                          for name, value in suggestion.items())
+        # Force-cast parameters to their correct types
+        for name, value in suggestion.items():
+            if optimizer.parameter_space[name]['type'] == 'int':
+                suggestion[name] = int(value)
+            if optimizer.parameter_space[name]['type'] == 'float':
+                suggestion[name] = float(value)
+            # Ignore enums, we don't know what their type is
+        return suggestion
+
+    def predict(self, optimizer, codes):
+        model = getattr(self._chooser, 'models', {}).get('main')
+        if model is None:
+            return None
+        task = self._task_group.tasks['main']
+        # The GP works with inputs in the unit hypercube and standardized
+        # values, so map its predictions back to the objective's units
+        mean, variance = model.predict(
+            task.to_unit(self._vectorify_codes(optimizer, codes)))
+        mean = task.unstandardize_mean(mean)
+        variance = task.unstandardize_variance(
+            variance + getattr(model, 'noise_value', 0.))
+        return mean, variance
+
+
+def _sample_chain(optimizer, indices, task_config, seed):
+    """ Sample one MCMC chain over the GP hyperparameters of a copy of a
+    ``SimpleSpearmint`` object with the Spearmint backend, for use by
+    ``SpearmintBackend._fit_chains``.
+
+    Returns
+    -------
+    hypers : dict
+        Hyperparameters at the end of the chain, as returned by
+        ``chooser.fit``.
+
+    samples : dict
+        Dictionary mapping task names to the hyperparameter samples of their
+        GP.
+    """
+    np.random.seed(seed)
+    backend = optimizer.backend
+    task_group = backend.task_group(optimizer, indices)
+    with optimizer._quiet():
+        hypers = backend.chooser(optimizer).fit(task_group, optimizer.hypers,
+                                                task_config)
+    samples = dict((name, list(model._hypers_list))
+                   for name, model in backend._chooser.models.items())
+    return hypers, samples
+
+
+def _normal_cdf(z):
+    """ Standard normal CDF, using the approximation 7.1.26 of the error
+    function from Abramowitz and Stegun (absolute error below 1.5e-7). """
+    x = np.abs(z)/np.sqrt(2)
+    t = 1./(1. + .3275911*x)
+    erf = 1. - t*(.254829592 + t*(-.284496736 + t*(
+        1.421413741 + t*(-1.453152027 + t*1.061405429))))*np.exp(-x**2)
+    return .5*(1. + np.sign(z)*erf)
+
+
+def _normal_pdf(z):
+    return np.exp(-.5*z**2)/np.sqrt(2*np.pi)
+
+
+def _matern52(A, B):
+    """ Matern-5/2 correlation between the rows of ``A`` and ``B``, which
+    have already been divided by the lengthscales.
+
+    Returns
+    -------
+    correlation : np.ndarray
+        Correlation matrix, shape ``(A.shape[0], B.shape[0])``.
+
+    s : np.ndarray
+        Scaled distances ``sqrt(5)*r``, needed for the gradient.
+    """
+    squared_distances = np.maximum(
+        np.sum(A**2, axis=1)[:, np.newaxis] + np.sum(B**2, axis=1) -
+        2*np.dot(A, B.T), 0.)
+    s = np.sqrt(5*squared_distances)
+    return (1. + s + s**2/3.)*np.exp(-s), s
+
+
+# Scales of the perturbations of the local searches of NumpyBackend, in the
+# unit hypercube
+_LOCAL_SCALES = [.02, .005]
+# Number of perturbations per local search and scale
+_N_PERTURBATIONS = 20
+
+# Lower and upper bounds of the log hyperparameters in the unit hypercube
+# with standardized objective values: lengthscales, amplitude and noise
+_LOG_LENGTHSCALE_BOUNDS = (np.log(1e-2), np.log(1e1))
+_LOG_AMPLITUDE_BOUNDS = (np.log(1e-2), np.log(1e2))
+_LOG_NOISE_BOUNDS = (np.log(1e-6), np.log(1.))
+# Added to the diagonal for numerical stability
+_JITTER = 1e-8
+
+
+def _log_marginal_likelihood(theta, X, y, noiseless, extra_noise=0.):
+    """ Log marginal likelihood of a zero-mean GP with a Matern-5/2 ARD
+    kernel, and its gradient with respect to the log hyperparameters
+    ``theta``, which are the log lengthscales, log amplitude and log noise
+    variance.  ``extra_noise`` is a fixed noise variance added to each
+    observation. """
+    n, num_dims = X.shape
+    lengthscales = np.exp(theta[:num_dims])
+    amplitude, noise = np.exp(theta[num_dims:])
+    A = X/lengthscales
+    correlation, s = _matern52(A, A)
+    signal = amplitude*correlation
+    K = signal + np.diag(noise + _JITTER + extra_noise*np.ones(n))
+    try:
+        L = np.linalg.cholesky(K)
+    except np.linalg.LinAlgError:
+        return -np.inf, np.zeros(theta.shape)
+    L_inv = np.linalg.inv(L)
+    K_inv = np.dot(L_inv.T, L_inv)
+    alpha = np.dot(K_inv, y)
+    log_likelihood = (-.5*np.dot(y, alpha) - np.sum(np.log(np.diag(L))) -
+                      .5*n*np.log(2*np.pi))
+    # d log p / d theta = tr((alpha alpha^T - K^-1) dK/dtheta)/2
+    W = np.outer(alpha, alpha) - K_inv
+    gradient = np.empty(theta.shape)
+    dK_common = amplitude*5./3.*(1. + s)*np.exp(-s)
+    for d in range(num_dims):
+        differences = (A[:, d, np.newaxis] - A[:, d])**2
+        gradient[d] = .5*np.sum(W*dK_common*differences)
+    gradient[num_dims] = .5*np.sum(W*signal)
+    gradient[num_dims + 1] = 0. if noiseless else .5*noise*np.trace(W)
+    return log_likelihood, gradient
+
+
+class NumpyBackend(Backend):
+    """ Lightweight backend with a Gaussian process implemented in NumPy,
+    which starts quickly and makes low-latency suggestions for
+    low-dimensional spaces.
+
+    Numeric parameters are scaled to the unit interval and enums are one-hot
+    encoded.  The objective values are standardized, and the GP has a zero
+    mean, a Matern-5/2 kernel with one lengthscale per input dimension, and
+    Gaussian noise (fixed to a tiny value for noiseless objectives).  Its
+    hyperparameters are fit by maximizing the marginal likelihood (type-II
+    maximum likelihood) with Adam, warm-started from the previous
+    hyperparameters.  Pending trials
+    are assigned their predicted mean ("kriging believer"), and suggestions
+    maximize expected improvement over random candidates and the
+    neighborhoods of the best trials, followed by local searches (restarts)
+    from the best candidates.  Trials with NaN objective values are ignored.
+    The observations of prior studies in ``optimizer.auxiliary`` (see
+    ``SimpleSpearmint.warm_start``) are added to the GP's data with extra
+    noise, so they shape the model without overriding the study's own
+    trials.
+
+    The candidates are generated and evaluated in chunks, which only keep
+    their best candidates, so memory stays bounded for large grids.  With
+    ``n_workers > 1``, the chunks and the restarts are spread over a thread
+    pool (NumPy releases the GIL in the heavy array operations).  The
+    perturbations of all restarts are evaluated in one batch, and each
+    round of the local searches continues from the best points found by any
+    of them.
+
+    Parameters
+    ----------
+    n_candidates : int
+        Number of random candidates, unless the ``grid_size`` option is set.
+
+    n_iters : int
+        Number of Adam iterations when fitting the hyperparameters.
+
+    learning_rate : float
+        Adam learning rate in log hyperparameter space.
+
+    chunk_size : int
+        Number of candidates evaluated at once.
+
+    n_restarts : int
+        Number of local searches, started from the best candidates.
+
+    n_workers : int
+        Number of threads to evaluate the chunks and restarts with.  The
+        thread pool is created on demand and shut down by ``close``.
+
+    """
+
+    supports_auxiliary = True
+
+    def __init__(self, n_candidates=2000, n_iters=50, learning_rate=.1,
+                 chunk_size=4096, n_restarts=10, n_workers=1):
+        self.n_candidates = n_candidates
+        self.n_iters = n_iters
+        self.learning_rate = learning_rate
+        self.chunk_size = chunk_size
+        self.n_restarts = n_restarts
+        self.n_workers = n_workers
+        self._posterior = None
+        self._executor = None
+
+    def __getstate__(self):
+        # The posterior is recomputed by the next fit rather than copied, and
+        # the thread pool is created again on demand
+        state = self.__dict__.copy()
+        state['_posterior'] = None
+        state['_executor'] = None
+        return state
+
+    def _map(self, function, items):
+        """ Apply ``function`` to each of ``items``, on the thread pool if
+        there are several workers. """
+        if self.n_workers <= 1 or len(items) <= 1:
+            return [function(item) for item in items]
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                self.n_workers)
+        return list(self._executor.map(function, items))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def transfer_hypers(self, hypers, parameter_space, optimizer):
+        # Map the lengthscales by parameter name and enum option, in the
+        # units of the parameters, since the GP inputs are scaled by each
+        # study's ranges
+        theta = np.asarray(hypers['theta'], dtype=float)
+        log_lengthscales, i = {}, 0
+        for name, spec in parameter_space.items():
+            if spec['type'] == 'enum':
+                for option in spec['options']:
+                    log_lengthscales[name, option] = theta[i]
+                    i += 1
+            else:
+                width = float(spec['max'] - spec['min']) or 1.
+                log_lengthscales[name] = theta[i] + np.log(width)
+                i += 1
+        if theta.size != i + 2:
+            return None
+        mapped = []
+        for name, spec in optimizer.parameter_space.items():
+            if spec['type'] == 'enum':
+                # New options start from the default lengthscale of half the
+                # unit interval
+                mapped.extend(log_lengthscales.get((name, option), np.log(.5))
+                              for option in spec['options'])
+            else:
+                width = float(spec['max'] - spec['min']) or 1.
+                mapped.append(log_lengthscales[name] - np.log(width))
+        # The amplitude and noise are relative to the standardized values
+        return {'theta': np.concatenate([mapped, theta[-2:]])}
+
+    def _features(self, optimizer, codes):
+        """ Map encoded parameter values to GP inputs. """
+        columns = []
+        for i, spec in enumerate(optimizer.parameter_space.values()):
+            if spec['type'] == 'enum':
+                columns.append(np.eye(len(spec['options']))[
+                    codes[:, i].astype(int)])
+            else:
+                width = float(spec['max'] - spec['min']) or 1.
+                columns.append(
+                    ((codes[:, i] - spec['min'])/width)[:, np.newaxis])
+        return np.hstack(columns)
+
+    def _fit_hypers(self, theta, X, y, noiseless, extra_noise):
+        """ Maximize the log marginal likelihood with Adam, starting from
+        ``theta``, and return the best hyperparameters visited. """
+        num_dims = X.shape[1]
+        lower = np.array([_LOG_LENGTHSCALE_BOUNDS[0]]*num_dims +
+                         [_LOG_AMPLITUDE_BOUNDS[0], _LOG_NOISE_BOUNDS[0]])
+        upper = np.array([_LOG_LENGTHSCALE_BOUNDS[1]]*num_dims +
+                         [_LOG_AMPLITUDE_BOUNDS[1], _LOG_NOISE_BOUNDS[1]])
+        theta = np.clip(theta, lower, upper)
+        best_theta, best_log_likelihood = theta, -np.inf
+        m, v = np.zeros(theta.shape), np.zeros(theta.shape)
+        beta1, beta2 = .9, .999
+        for t in range(1, self.n_iters + 1):
+            log_likelihood, gradient = _log_marginal_likelihood(
+                theta, X, y, noiseless, extra_noise)
+            if log_likelihood > best_log_likelihood:
+                best_theta, best_log_likelihood = theta, log_likelihood
+            m = beta1*m + (1 - beta1)*gradient
+            v = beta2*v + (1 - beta2)*gradient**2
+            step = (m/(1 - beta1**t))/(np.sqrt(v/(1 - beta2**t)) + 1e-8)
+            theta = np.clip(theta + self.learning_rate*step, lower, upper)
+        return best_theta
+
+    def fit(self, optimizer, indices, fit_hypers):
+        trials = optimizer.trials
+        codes, values, valid = trials.inputs, trials.values, trials.valid
+        if indices is not None:
+            codes, values, valid = (codes[indices], values[indices],
+                                    valid[indices])
+        X = self._features(optimizer, codes[valid])
+        y = values[valid]
+        auxiliary = optimizer.auxiliary
+        if y.size == 0 and auxiliary is None:
+            self._posterior = None
+            return optimizer.hypers
+        noiseless = (optimizer.task_config['main']['likelihood'] ==
+                     'NOISELESS')
+        # Standardize the objective values
+        mean, std = (y.mean(), y.std()) if y.size else (0., 1.)
+        std = std if std > 0 else 1.
+        y = (y - mean)/std
+        best = y.min() if y.size else auxiliary['values'].min()
+        extra_noise = np.zeros(y.size)
+        if auxiliary is not None:
+            # The prior observations are already standardized
+            X = np.vstack([X, self._features(optimizer, auxiliary['codes'])])
+            y = np.concatenate([y, auxiliary['values']])
+            extra_noise = np.concatenate([extra_noise, auxiliary['noise']])
+        num_dims = X.shape[1]
+        hypers = optimizer.hypers
+        if hypers and len(hypers.get('theta', [])) == num_dims + 2:
+            theta = np.array(hypers['theta'])
+        else:
+            # Lengthscales of half the unit interval, unit amplitude and
+            # little noise
+            theta = np.array([np.log(.5)]*num_dims + [0., np.log(1e-3)])
+        if noiseless:
+            theta[-1] = _LOG_NOISE_BOUNDS[0]
+        if fit_hypers:
+            with optimizer.stats.phase('fit'):
+                theta = self._fit_hypers(theta, X, y, noiseless,
+                                         extra_noise)
+        with optimizer.stats.phase('posterior'):
+            self._posterior = self._condition(theta, X, y, extra_noise)
+            if optimizer.pending_values:
+                # Assign the pending trials their predicted mean
+                X_pending = self._features(
+                    optimizer, optimizer._encode_values(
+                        optimizer.pending_values))
+                y_pending = self._predict(X_pending)[0]
+                self._posterior = self._condition(
+                    theta, np.vstack([X, X_pending]),
+                    np.concatenate([y, y_pending]),
+                    np.concatenate([extra_noise,
+                                    np.zeros(X_pending.shape[0])]))
+        self._scale = (mean, std)
+        self._best = best
+        return {'theta': theta}
+
+    def _condition(self, theta, X, y, extra_noise):
+        """ Compute what's needed to predict with the GP posterior. """
+        num_dims = X.shape[1]
+        lengthscales = np.exp(theta[:num_dims])
+        amplitude, noise = np.exp(theta[num_dims:])
+        A = X/lengthscales
+        K = (amplitude*_matern52(A, A)[0] +
+             np.diag(noise + _JITTER + extra_noise))
+        L_inv = np.linalg.inv(np.linalg.cholesky(K))
+        alpha = np.dot(L_inv.T, np.dot(L_inv, y))
+        return {'A': A, 'lengthscales': lengthscales,
+                'amplitude': amplitude, 'noise': noise,
+                'L_inv': L_inv, 'alpha': alpha}
+
+    def _predict(self, X):
+        """ Posterior mean and variance (without noise) of the standardized
+        objective. """
+        posterior = self._posterior
+        k = posterior['amplitude']*_matern52(
+            X/posterior['lengthscales'], posterior['A'])[0]
+        mean = np.dot(k, posterior['alpha'])
+        v = np.dot(posterior['L_inv'], k.T)
+        variance = np.maximum(posterior['amplitude'] - np.sum(v**2, axis=0),
+                              1e-12)
+        return mean, variance
+
+    def _expected_improvement(self, optimizer, unit):
+        """ Expected improvement at points of the unit hypercube (see
+        ``SimpleSpearmint._unit_to_codes``). """
+        mean, variance = self._predict(
+            self._features(optimizer, optimizer._unit_to_codes(unit)))
+        std = np.sqrt(variance)
+        z = (self._best - mean)/std
+        return (self._best - mean)*_normal_cdf(z) + std*_normal_pdf(z)
+
+    def _best_candidates(self, optimizer, candidates, n_best):
+        """ Evaluate expected improvement on candidates and keep the
+        ``n_best`` best ones. """
+        ei = self._expected_improvement(optimizer, candidates)
+        if ei.shape[0] > n_best:
+            best = np.argpartition(-ei, n_best)[:n_best]
+            candidates, ei = candidates[best], ei[best]
+        return candidates, ei
+
+    def _evaluate_chunked(self, optimizer, candidates):
+        """ Evaluate expected improvement on candidates in chunks, on the
+        thread pool if there are several workers. """
+        chunks = [candidates[start:start + self.chunk_size]
+                  for start in range(0, candidates.shape[0], self.chunk_size)]
+        return np.concatenate(self._map(
+            lambda chunk: self._expected_improvement(optimizer, chunk),
+            chunks))
+
+    def suggest(self, optimizer):
+        n_parameters = len(optimizer.parameter_space)
+        if self._posterior is None:
+            unit = np.random.rand(1, n_parameters)
+            return optimizer._decode_codes(optimizer._unit_to_codes(unit))[0]
+        n_candidates = optimizer.chooser_options.get(
+            'grid_size', self.n_candidates)
+        optimizer.stats.count('grid_size', n_candidates)
+        with optimizer.stats.phase('suggest'):
+            # Each chunk draws its candidates from its own seed, so that the
+            # candidates don't depend on the scheduling of the threads
+            sizes = [self.chunk_size]*(n_candidates//self.chunk_size)
+            if n_candidates % self.chunk_size:
+                sizes.append(n_candidates % self.chunk_size)
+            seeds = np.random.randint(2**31, size=len(sizes))
+
+            def search_chunk(chunk):
+                size, seed = chunk
+                candidates = np.random.RandomState(seed).rand(size,
+                                                              n_parameters)
+                return self._best_candidates(optimizer, candidates,
+                                             self.n_restarts)
+            results = self._map(search_chunk, list(zip(sizes, seeds)))
+            # Search around the best trials too
+            trials = optimizer.trials
+            values = np.where(trials.valid, trials.values, np.inf)
+            best = np.argsort(values)[:min(10, len(trials))]
+            best_unit = optimizer._codes_to_unit(trials.inputs[best])
+            results.append(self._best_candidates(optimizer, np.clip(
+                np.repeat(best_unit, 20, axis=0) +
+                .05*np.random.randn(20*best.size, n_parameters), 0, 1),
+                self.n_restarts))
+            candidates = np.vstack([result[0] for result in results])
+            ei = np.concatenate([result[1] for result in results])
+            # Local searches from the best candidates with random
+            # perturbations at shrinking scales.  The perturbations of all
+            # restarts are evaluated together, and the restarts share what
+            # they find: each round continues from the best points overall.
+            best = np.argsort(-ei)[:self.n_restarts]
+            points, point_ei = candidates[best], ei[best]
+            for scale in _LOCAL_SCALES:
+                local = np.clip(
+                    np.repeat(points, _N_PERTURBATIONS, axis=0) +
+                    scale*np.random.randn(
+                        _N_PERTURBATIONS*points.shape[0], n_parameters),
+                    0, 1)
+                points = np.vstack([points, local])
+                point_ei = np.concatenate([
+                    point_ei, self._evaluate_chunked(optimizer, local)])
+                best = np.argsort(-point_ei)[:self.n_restarts]
+                points, point_ei = points[best], point_ei[best]
+            suggestion = points[:1]
+        return optimizer._decode_codes(
+            optimizer._unit_to_codes(suggestion))[0]
+
+    def predict(self, optimizer, codes):
+        if self._posterior is None:
+            return None
+        mean, variance = self._predict(self._features(optimizer, codes))
+        mean_offset, std = self._scale
+        return (mean_offset + std*mean,
+                std**2*(variance + self._posterior['noise']))
+
+
+# Backends which can be selected by name
+BACKENDS = {'spearmint': SpearmintBackend, 'numpy': NumpyBackend}
@@ -0,0 +1,113 @@
+import shelve
+import collections
+
+
+class EvaluationCache(object):
+    """ Cache of objective values, keyed on encoded parameter values (see
+    ``SimpleSpearmint._encode_columns``), which are canonical: each enum
+    option and each integer has exactly one encoding.
+
+    At most ``max_size`` entries are kept in memory, evicting the least
+    recently used ones.  If ``path`` is given, all entries are also stored in
+    a ``shelve`` database there, which outlives the process and from which
+    evicted entries are reloaded.  The database shouldn't be shared by
+    concurrent processes.
+
+    Parameters
+    ----------
+    max_size : int
+        Maximum number of entries to keep in memory; unlimited by default.
+
+    path : str
+        Path of the on-disk database.
+
+    Examples
+    --------
+    >>> ss = SimpleSpearmint(parameter_space, cache=EvaluationCache(10000))
+    >>> suggestion = ss.suggest()
+    >>> value = ss.lookup(suggestion)
+    >>> if value is None:
+    ...     value = objective(**suggestion)
+    >>> ss.update(suggestion, value)
+    >>> ss.cache.hit_rate
+
+    """
+
+    def __init__(self, max_size=None, path=None):
+        self.max_size = max_size
+        self.path = path
+        self._entries = collections.OrderedDict()
+        self._shelf = None if path is None else shelve.open(path)
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        # Copies, e.g. those made by SimpleSpearmint.suggest_async, only keep
+        # the entries in memory
+        state = self.__dict__.copy()
+        state['_shelf'] = None
+        return state
+
+    def __len__(self):
+        if self._shelf is not None:
+            return len(self._shelf)
+        return len(self._entries)
+
+    @staticmethod
+    def key(codes):
+        """ Key of one row of encoded parameter values. """
+        return ','.join(repr(float(code)) for code in codes)
+
+    def __contains__(self, key):
+        return key in self._entries or (self._shelf is not None and
+                                        key in self._shelf)
+
+    def get(self, key):
+        """ Look up an objective value, counting hits and misses.
+
+        Parameters
+        ----------
+        key : str
+            Key of the parameter values, see ``key``.
+
+        Returns
+        -------
+        value : float or None
+            The cached objective value, or None.
+        """
+        if key in self._entries:
+            value = self._entries.pop(key)
+        elif self._shelf is not None and key in self._shelf:
+            value = self._shelf[key]
+        else:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Mark as most recently used
+        self._put_memory(key, value)
+        return value
+
+    def put(self, key, value):
+        """ Store an objective value. """
+        self._entries.pop(key, None)
+        self._put_memory(key, value)
+        if self._shelf is not None:
+            self._shelf[key] = value
+
+    def _put_memory(self, key, value):
+        self._entries[key] = value
+        if self.max_size is not None:
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        """ Fraction of lookups which were answered from the cache. """
+        n_lookups = self.hits + self.misses
+        return self.hits/float(n_lookups) if n_lookups else 0.
+
+    def close(self):
+        """ Write the on-disk database and close it. """
+        if self._shelf is not None:
+            self._shelf.close()
+            self._shelf = None
@@ -0,0 +1,142 @@
+import json
+import socket
+import itertools
+
+
+def _to_json(value):
+    """ Convert NumPy scalars and arrays, e.g. in suggestions, to JSON. """
+    # Duck-typed, so that NumPy doesn't need to be imported here
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError('{!r} is not JSON serializable'.format(value))
+
+
+class SuggestionClient(object):
+    """ Client for a ``simple_spearmint.server.SuggestionServer``.  It only
+    uses the standard library, so workers don't need Spearmint to use it.
+
+    Requests and responses are exchanged as newline-delimited JSON over a
+    Unix domain socket or a TCP connection, which is opened on the first
+    request.
+
+    Parameters
+    ----------
+    path : str
+        Path of the server's Unix domain socket.
+
+    host : str
+        Host of the server, when connecting over TCP.
+
+    port : int
+        Port of the server, when connecting over TCP.
+
+    timeout : float
+        Socket timeout in seconds; by default, requests block until they are
+        answered.
+
+    Examples
+    --------
+    >>> client = SuggestionClient('/tmp/study.sock')
+    >>> suggestion = client.suggest()
+    >>> client.update(suggestion, objective(**suggestion))
+
+    """
+
+    def __init__(self, path=None, host='127.0.0.1', port=None, timeout=None):
+        if path is None and port is None:
+            raise ValueError('Either path or port must be given.')
+        self.path = path
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._socket = None
+        self._file = None
+        self._ids = itertools.count()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _connect(self):
+        if self.path is not None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(self.timeout)
+            self._socket.connect(self.path)
+        else:
+            self._socket = socket.create_connection(
+                (self.host, self.port), self.timeout)
+        self._file = self._socket.makefile('rb')
+
+    def close(self):
+        """ Close the connection to the server. """
+        if self._socket is not None:
+            self._file.close()
+            self._socket.close()
+            self._socket = None
+            self._file = None
+
+    def _call(self, method, params=None):
+        """ Send a request and wait for its response.
+
+        Parameters
+        ----------
+        method : str
+            Name of the ``SimpleSpearmint`` method to call.
+
+        params : dict
+            Keyword arguments of the method.
+
+        Returns
+        -------
+        result
+            The method's return value, decoded from JSON.
+        """
+        if self._socket is None:
+            self._connect()
+        request = {'id': next(self._ids), 'method': method,
+                   'params': params or {}}
+        self._socket.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        line = self._file.readline()
+        if not line:
+            self.close()
+            raise IOError('Connection closed by the server.')
+        response = json.loads(line.decode('utf-8'))
+        if 'error' in response:
+            error = response['error']
+            # Invalid arguments are reported like SimpleSpearmint does
+            if error['type'] == 'ValueError':
+                raise ValueError(error['message'])
+            raise RuntimeError('{}: {}'.format(error['type'],
+                                               error['message']))
+        return response['result']
+
+    def suggest(self):
+        """ Get a new parameter suggestion from the server, which stays
+        pending until its result is reported with ``update``.
+
+        Returns
+        -------
+        suggestion : dict
+            Dictionary mapping parameter names to the suggested values.
+        """
+        return self._call('suggest')
+
+    def suggest_random(self, n=None, method='uniform', seed=None):
+        """ Get random parameter suggestions; see
+        ``SimpleSpearmint.suggest_random``. """
+        return self._call('suggest_random',
+                          {'n': n, 'method': method, 'seed': seed})
+
+    def update(self, parameter_values, objective_value):
+        """ Report the objective value of a trial; see
+        ``SimpleSpearmint.update``. """
+        self._call('update', {'parameter_values': parameter_values,
+                              'objective_value': objective_value})
+
+    def get_best_parameters(self):
+        """ Get the best parameters and objective value found so far; see
+        ``SimpleSpearmint.get_best_parameters``. """
+        best_parameters, best_objective = self._call('get_best_parameters')
+        return best_parameters, best_objective
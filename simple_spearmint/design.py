@@ -0,0 +1,59 @@
+import warnings
+import numpy as np
+
+
+def unit_design(n, num_dims, method='uniform', seed=None):
+    """ Generate a design of points in the unit hypercube.
+
+    Parameters
+    ----------
+    n : int
+        Number of points.
+
+    num_dims : int
+        Dimensionality of the hypercube.
+
+    method : str
+        ``'uniform'`` for independent uniform samples, ``'sobol'`` for a
+        scrambled Sobol sequence or ``'lhs'`` for a Latin hypercube sample.
+        The latter two cover the space more evenly than uniform samples.
+        Sobol sequences require scipy >= 1.7, which isn't needed otherwise
+        (e.g. with the NumPy backend); without it, a Latin hypercube sample
+        is generated instead, with a warning.
+
+    seed : int
+        Seed for the random number generator.  By default, a seed is drawn
+        from ``np.random``, so that ``np.random.seed`` makes designs
+        reproducible.
+
+    Returns
+    -------
+    design : np.ndarray
+        Array of shape ``(n, num_dims)`` with values in ``[0, 1)``.
+    """
+    if seed is None:
+        seed = np.random.randint(2**31 - 1)
+    if method == 'sobol':
+        try:
+            import scipy.stats.qmc
+        except ImportError:
+            warnings.warn('Sobol designs require scipy >= 1.7, generating a '
+                          'Latin hypercube sample instead.')
+            method = 'lhs'
+    if method == 'uniform':
+        return np.random.RandomState(seed).uniform(size=(n, num_dims))
+    elif method == 'lhs':
+        rng = np.random.RandomState(seed)
+        # Put one point in each of n equal-width strata along each dimension,
+        # with the strata shuffled independently for each dimension
+        strata = np.argsort(rng.uniform(size=(n, num_dims)), axis=0)
+        return (strata + rng.uniform(size=(n, num_dims)))/float(n)
+    elif method == 'sobol':
+        sampler = scipy.stats.qmc.Sobol(num_dims, scramble=True, seed=seed)
+        with warnings.catch_warnings():
+            # Sobol sequences are best balanced when n is a power of 2, but
+            # they are still far more even than uniform samples otherwise
+            warnings.simplefilter('ignore')
+            return sampler.random(n)
+    else:
+        raise ValueError('Design method {} is not valid.'.format(method))
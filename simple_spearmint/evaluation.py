@@ -0,0 +1,205 @@
+import time
+import threading
+import traceback
+import collections
+import multiprocessing
+import concurrent.futures
+try:
+    import resource
+except ImportError:
+    # Memory limits aren't available, e.g. on Windows
+    resource = None
+
+
+def _evaluate(connection, function, args, kwargs, max_memory):
+    """ Body of an evaluation subprocess: apply the memory limit, call the
+    function and send back its result or the traceback of its exception. """
+    if max_memory is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (max_memory, max_memory))
+    try:
+        result = ('ok', float(function(*args, **kwargs)))
+    except BaseException:
+        result = ('error', traceback.format_exc())
+    connection.send(result)
+    connection.close()
+
+
+class _Evaluation(object):
+    """ Bookkeeping for one call submitted to a ``ManagedExecutor``. """
+
+    def __init__(self, future, function, args, kwargs):
+        self.future = future
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.process = None
+        self.connection = None
+        self.deadline = None
+
+
+class ManagedExecutor(concurrent.futures.Executor):
+    """ Executor which runs every call in its own subprocess, which is killed
+    if it exceeds a wall-clock time limit, and whose memory can be limited.
+    Calls which time out, crash (e.g. segfault or get killed by the kernel)
+    or raise an exception don't raise; their result is NaN instead, so that
+    ``SimpleSpearmint.update`` records them as failed trials, which
+    Spearmint's constraint model learns to avoid.  A hung evaluation
+    therefore can't stall a study, and each trial takes at most ``timeout``
+    seconds.
+
+    The calls must return a scalar.  With the ``fork`` start method (the
+    default on Linux), the function doesn't need to be picklable.
+
+    Parameters
+    ----------
+    n_workers : int
+        Maximum number of concurrent subprocesses.  Defaults to the number of
+        CPUs.
+
+    timeout : float
+        Wall-clock time limit of each call in seconds; unlimited by default.
+
+    max_memory : int
+        Limit on the address space of each subprocess in bytes (see
+        ``resource.RLIMIT_AS``), e.g. ``4*1024**3``; unlimited by default.
+        Note that this also counts memory which is reserved but never used,
+        e.g. by BLAS thread pools, so it should be generous.  Not available
+        on Windows.
+
+    poll_interval : float
+        Time in seconds between checks of the running subprocesses.
+
+    Attributes
+    ----------
+    counts : collections.Counter
+        Number of calls which were ``'completed'``, timed out
+        (``'timeout'``), ``'crashed'`` or raised an exception
+        (``'error'``).
+
+    failures : list of tuple
+        ``(reason, kwargs, detail)`` for each failed call, where ``detail``
+        is the traceback of an exception or the exit code of a crashed
+        subprocess.
+
+    Examples
+    --------
+    >>> with ManagedExecutor(8, timeout=600, max_memory=8*1024**3) as pool:
+    ...     best_parameters, best_objective = ss.optimize(
+    ...         objective, n_trials=100, executor=pool)
+    >>> pool.counts
+
+    """
+
+    def __init__(self, n_workers=None, timeout=None, max_memory=None,
+                 poll_interval=.05):
+        if n_workers is None:
+            n_workers = multiprocessing.cpu_count()
+        if max_memory is not None and resource is None:
+            raise ValueError('max_memory is not supported on this platform.')
+        self.n_workers = n_workers
+        self.timeout = timeout
+        self.max_memory = max_memory
+        self.poll_interval = poll_interval
+        self.counts = collections.Counter()
+        self.failures = []
+        self._waiting = collections.deque()
+        self._running = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._shutdown = False
+        self._monitor = threading.Thread(target=self._run)
+        self._monitor.daemon = True
+        self._monitor.start()
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError('Cannot submit after shutdown.')
+            future = concurrent.futures.Future()
+            self._waiting.append(_Evaluation(future, fn, args, kwargs))
+        self._wakeup.set()
+        return future
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            self._shutdown = True
+        self._wakeup.set()
+        if wait:
+            self._monitor.join()
+
+    def _start(self, evaluation):
+        """ Start the subprocess of a call. """
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        evaluation.process = multiprocessing.Process(
+            target=_evaluate,
+            args=(sender, evaluation.function, evaluation.args,
+                  evaluation.kwargs, self.max_memory))
+        evaluation.process.start()
+        # Only the child writes to the pipe
+        sender.close()
+        evaluation.connection = receiver
+        if self.timeout is not None:
+            evaluation.deadline = time.time() + self.timeout
+        self._running.append(evaluation)
+
+    def _finish(self, evaluation, reason, value, detail=None):
+        """ Clean up after a call and resolve its future. """
+        self._running.remove(evaluation)
+        evaluation.connection.close()
+        evaluation.process.join()
+        self.counts[reason] += 1
+        if reason != 'completed':
+            self.failures.append((reason, evaluation.kwargs, detail))
+        evaluation.future.set_result(value)
+
+    def _check(self, evaluation):
+        """ Resolve a call if its subprocess has finished, crashed or run out
+        of time. """
+        process = evaluation.process
+        if evaluation.connection.poll():
+            try:
+                status, payload = evaluation.connection.recv()
+            except EOFError:
+                # The subprocess died without sending a result
+                process.join()
+                self._finish(evaluation, 'crashed', float('nan'),
+                             process.exitcode)
+                return
+            if status == 'ok':
+                self._finish(evaluation, 'completed', payload)
+            else:
+                self._finish(evaluation, 'error', float('nan'), payload)
+        elif not process.is_alive():
+            # The pipe may have been filled just before the process exited
+            if evaluation.connection.poll():
+                return self._check(evaluation)
+            self._finish(evaluation, 'crashed', float('nan'),
+                         process.exitcode)
+        elif (evaluation.deadline is not None and
+                time.time() > evaluation.deadline):
+            process.terminate()
+            process.join(1.)
+            if process.is_alive():
+                # Ignored SIGTERM; Process.kill is only available on Python
+                # 3.7+
+                getattr(process, 'kill', process.terminate)()
+            self._finish(evaluation, 'timeout', float('nan'), self.timeout)
+
+    def _run(self):
+        """ Monitor thread: start waiting calls when there's a free worker
+        and resolve the running ones. """
+        while True:
+            with self._lock:
+                while self._waiting and len(self._running) < self.n_workers:
+                    evaluation = self._waiting.popleft()
+                    # Skip calls which were cancelled while waiting
+                    if evaluation.future.set_running_or_notify_cancel():
+                        self._start(evaluation)
+                done = (self._shutdown and not self._waiting and
+                        not self._running)
+            if done:
+                return
+            for evaluation in list(self._running):
+                self._check(evaluation)
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
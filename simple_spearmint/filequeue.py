@@ -0,0 +1,367 @@
+import os
+import json
+import time
+import uuid
+import socket
+import threading
+import traceback
+from .client import _to_json
+
+# Subdirectories of a queue directory: suggestions waiting for a worker,
+# suggestions being evaluated, results waiting to be ingested, and files
+# being written
+_PENDING = 'pending'
+_CLAIMED = 'claimed'
+_RESULTS = 'results'
+_TMP = 'tmp'
+# Marker file which tells workers that no more suggestions will come
+_FINISHED = 'finished'
+
+
+def _write_atomic(directory, name, content):
+    """ Write a JSON file so that it appears in ``directory`` all at once.
+
+    The file is written to the queue's ``tmp`` subdirectory first and then
+    renamed, which is atomic on POSIX file systems, including NFS.
+    """
+    tmp_path = os.path.join(os.path.dirname(directory), _TMP,
+                            '{}.{}'.format(name, uuid.uuid4().hex))
+    with open(tmp_path, 'w') as f:
+        json.dump(content, f, default=_to_json)
+    os.rename(tmp_path, os.path.join(directory, name))
+
+
+def _remove(path):
+    """ Remove a file which may already be gone. """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class FileQueueDriver(object):
+    """ Hands out suggestions of a ``SimpleSpearmint`` object to workers on
+    any machine which shares the queue directory, e.g. over NFS, without a
+    database.  See ``FileQueueWorker`` for the worker side.
+
+    Each suggestion is written as a JSON file to ``directory/pending``.  A
+    worker claims it by renaming it to ``directory/claimed``, which only one
+    worker can do, and keeps touching the claimed file while it works.  When
+    it is done, the worker writes the result to ``directory/results``, from
+    where the driver passes it to ``SimpleSpearmint.update``.  If a claimed
+    file isn't touched for ``lease`` seconds, its worker is assumed dead and
+    the suggestion is put back into ``directory/pending``.  Leases are
+    compared with file modification times, so the clocks of the machines
+    should be synchronized.  A suggestion whose lease expires more than
+    ``max_reclaims`` times, e.g. because it crashes every worker, is given
+    up on and recorded with a NaN objective value, as are suggestions whose
+    objective raised an exception in the worker.
+
+    Outstanding suggestions are registered as pending with the optimizer
+    until their result is ingested.
+
+    Parameters
+    ----------
+    optimizer : SimpleSpearmint
+        The optimizer which makes the suggestions.
+
+    directory : str
+        Queue directory; created if it doesn't exist.
+
+    lease : float
+        Time in seconds after which a claimed suggestion whose file hasn't
+        been touched is reclaimed.
+
+    max_reclaims : int
+        Number of times a suggestion is reclaimed before it is given up on.
+
+    Attributes
+    ----------
+    failures : list of tuple
+        ``(reason, parameters, detail)`` for each failed suggestion, where
+        the reason is ``'error'`` if the objective raised an exception,
+        whose traceback is the detail, or ``'expired'`` if it was given up
+        on.
+
+    Examples
+    --------
+    >>> driver = FileQueueDriver(ss, '/nfs/queue')
+    >>> best_parameters, best_objective = driver.run(n_trials=100,
+    ...                                              n_parallel=16)
+
+    """
+
+    def __init__(self, optimizer, directory, lease=60., max_reclaims=3):
+        self.optimizer = optimizer
+        self.directory = directory
+        self.lease = lease
+        self.max_reclaims = max_reclaims
+        for name in [_PENDING, _CLAIMED, _RESULTS, _TMP]:
+            path = os.path.join(directory, name)
+            if not os.path.isdir(path):
+                os.makedirs(path)
+        _remove(os.path.join(directory, _FINISHED))
+        # Map the IDs of outstanding suggestions to the suggestions
+        self.outstanding = {}
+        self.n_reclaimed = 0
+        # Number of times each outstanding suggestion was reclaimed
+        self.reclaims = {}
+        self.failures = []
+
+    def _path(self, subdirectory, trial_id):
+        return os.path.join(self.directory, subdirectory, trial_id + '.json')
+
+    def submit(self, n=1):
+        """ Make ``n`` suggestions and put them into the queue.
+
+        Parameters
+        ----------
+        n : int
+            Number of suggestions.
+
+        Returns
+        -------
+        trial_ids : list of str
+            IDs of the suggestions.
+        """
+        if n <= 0:
+            return []
+        trial_ids = []
+        # suggest_batch registers the suggestions as pending
+        for suggestion in self.optimizer.suggest_batch(n):
+            trial_id = uuid.uuid4().hex
+            self.outstanding[trial_id] = suggestion
+            _write_atomic(os.path.join(self.directory, _PENDING),
+                          trial_id + '.json',
+                          {'id': trial_id, 'parameters': suggestion})
+            trial_ids.append(trial_id)
+        return trial_ids
+
+    def poll(self):
+        """ Ingest the results which are available and reclaim suggestions
+        whose lease has expired.
+
+        Returns
+        -------
+        n_results : int
+            Number of results which were ingested.
+        """
+        n_results = 0
+        results = os.path.join(self.directory, _RESULTS)
+        for name in sorted(os.listdir(results)):
+            path = os.path.join(results, name)
+            with open(path) as f:
+                result = json.load(f)
+            trial_id = result['id']
+            # A reclaimed suggestion may be evaluated twice; only the first
+            # result counts
+            if trial_id in self.outstanding:
+                if 'error' in result:
+                    self.failures.append(('error', result['parameters'],
+                                          result['error']))
+                self._finish(trial_id, result['objective_value'])
+                n_results += 1
+            _remove(path)
+        # Reclaim suggestions whose worker stopped renewing the lease
+        claimed = os.path.join(self.directory, _CLAIMED)
+        now = time.time()
+        for name in os.listdir(claimed):
+            path = os.path.join(claimed, name)
+            trial_id = name[:-len('.json')]
+            try:
+                expired = now - os.path.getmtime(path) > self.lease
+                if (expired and trial_id in self.outstanding and
+                        self.reclaims.get(trial_id, 0) >= self.max_reclaims):
+                    # Don't let the suggestion take down worker after worker
+                    self.failures.append(
+                        ('expired', self.outstanding[trial_id], None))
+                    self._finish(trial_id, float('nan'))
+                    n_results += 1
+                elif expired:
+                    os.rename(path, os.path.join(self.directory, _PENDING,
+                                                 name))
+                    self.reclaims[trial_id] = (
+                        self.reclaims.get(trial_id, 0) + 1)
+                    self.n_reclaimed += 1
+            except OSError:
+                # The worker finished in the meantime
+                pass
+        return n_results
+
+    def _finish(self, trial_id, objective_value):
+        """ Pass the result of an outstanding suggestion to the optimizer and
+        remove its files. """
+        # Update with the suggestion as it was made, so that it matches the
+        # pending trial exactly
+        self.optimizer.update(self.outstanding.pop(trial_id), objective_value)
+        self.reclaims.pop(trial_id, None)
+        _remove(self._path(_PENDING, trial_id))
+        _remove(self._path(_CLAIMED, trial_id))
+
+    def run(self, n_trials, n_parallel, poll_interval=1.):
+        """ Run the optimization until ``n_trials`` results have been
+        ingested, keeping up to ``n_parallel`` suggestions outstanding.
+
+        Parameters
+        ----------
+        n_trials : int
+            Number of results to ingest.
+
+        n_parallel : int
+            Maximum number of outstanding suggestions.
+
+        poll_interval : float
+            Time in seconds between polls of the queue directory.
+
+        Returns
+        -------
+        best_parameters : dict
+            Dictionary mapping parameter names to the best values found.
+
+        best_objective : float
+            Best objective value found.
+        """
+        n_results = 0
+        try:
+            while n_results < n_trials:
+                self.submit(min(n_parallel - len(self.outstanding),
+                                n_trials - n_results -
+                                len(self.outstanding)))
+                n_results += self.poll()
+                if n_results < n_trials:
+                    time.sleep(poll_interval)
+        finally:
+            self.close()
+        return self.optimizer.get_best_parameters()
+
+    def close(self):
+        """ Withdraw the outstanding suggestions and tell the workers to
+        stop. """
+        for trial_id, suggestion in self.outstanding.items():
+            _remove(self._path(_PENDING, trial_id))
+            self.optimizer.remove_pending(suggestion)
+        self.outstanding = {}
+        self.reclaims = {}
+        with open(os.path.join(self.directory, _FINISHED), 'w'):
+            pass
+
+
+class FileQueueWorker(object):
+    """ Evaluates suggestions from the queue directory of a
+    ``FileQueueDriver``.  It only uses the standard library, so workers don't
+    need Spearmint.
+
+    Parameters
+    ----------
+    directory : str
+        Queue directory.
+
+    lease : float
+        Lease time of the driver; the claimed file is touched every
+        ``lease/4`` seconds while the objective is evaluated.
+
+    worker_id : str
+        Name of this worker, stored with its results.  Defaults to the host
+        name and process ID.
+
+    """
+
+    def __init__(self, directory, lease=60., worker_id=None):
+        self.directory = directory
+        self.lease = lease
+        if worker_id is None:
+            worker_id = '{}-{}'.format(socket.gethostname(), os.getpid())
+        self.worker_id = worker_id
+
+    def claim(self):
+        """ Claim a suggestion.
+
+        Returns
+        -------
+        trial : tuple or None
+            Tuple of the trial's ID and its parameters, or None if no
+            suggestion is available.
+        """
+        pending = os.path.join(self.directory, _PENDING)
+        for name in sorted(os.listdir(pending)):
+            path = os.path.join(pending, name)
+            try:
+                # Start the lease before the file becomes visible as claimed
+                os.utime(path, None)
+                os.rename(path, os.path.join(self.directory, _CLAIMED, name))
+            except OSError:
+                # Another worker claimed it first
+                continue
+            with open(os.path.join(self.directory, _CLAIMED, name)) as f:
+                trial = json.load(f)
+            return trial['id'], trial['parameters']
+        return None
+
+    def renew(self, trial_id):
+        """ Renew the lease of a claimed suggestion. """
+        try:
+            os.utime(os.path.join(self.directory, _CLAIMED,
+                                  trial_id + '.json'), None)
+        except OSError:
+            # Reclaimed or completed
+            pass
+
+    def complete(self, trial_id, parameters, objective_value, error=None):
+        """ Report the result of a claimed suggestion, and the traceback of
+        the objective's exception, if it raised one. """
+        result = {'id': trial_id, 'parameters': parameters,
+                  'objective_value': objective_value,
+                  'worker': self.worker_id}
+        if error is not None:
+            result['error'] = error
+        _write_atomic(os.path.join(self.directory, _RESULTS),
+                      trial_id + '.json', result)
+        _remove(os.path.join(self.directory, _CLAIMED, trial_id + '.json'))
+
+    def run(self, objective, poll_interval=1.):
+        """ Evaluate suggestions until the driver is finished.  If the
+        objective raises an exception, the suggestion is reported with a NaN
+        objective value and the exception's traceback.
+
+        Parameters
+        ----------
+        objective : callable
+            Objective function, called as ``objective(**parameters)``.
+
+        poll_interval : float
+            Time in seconds to wait when no suggestion is available.
+
+        Returns
+        -------
+        n_completed : int
+            Number of suggestions this worker evaluated.
+        """
+        n_completed = 0
+        finished = os.path.join(self.directory, _FINISHED)
+        while True:
+            trial = self.claim()
+            if trial is None:
+                if os.path.exists(finished):
+                    return n_completed
+                time.sleep(poll_interval)
+                continue
+            trial_id, parameters = trial
+            # Renew the lease in the background while evaluating
+            done = threading.Event()
+
+            def renew():
+                while not done.wait(self.lease/4.):
+                    self.renew(trial_id)
+            renewer = threading.Thread(target=renew)
+            renewer.daemon = True
+            renewer.start()
+            error = None
+            try:
+                objective_value = float(objective(**parameters))
+            except Exception:
+                objective_value, error = float('nan'), traceback.format_exc()
+            finally:
+                done.set()
+                renewer.join()
+            self.complete(trial_id, parameters, objective_value, error)
+            n_completed += 1
@@ -0,0 +1,176 @@
+import heapq
+import numpy as np
+
+# Type of the column of each parameter type; enums are stored as the index
+# of their option
+_COLUMN_TYPES = {'float': np.float64, 'int': np.int64, 'enum': np.int32}
+
+
+class TrialHistory(object):
+    """ Columnar record of the trials of a ``SimpleSpearmint`` object, for
+    querying the best trials cheaply while the study runs.
+
+    The trials are stored in a growable NumPy structured array with one typed
+    column per parameter (enums as the index of their option) and a column
+    ``'objective'`` holding the reported objective values.  The best trial,
+    the best objective value after each trial (the regret curve, up to the
+    optimum) and a heap of the ``max_top_k`` best trials are maintained as
+    trials are added, so ``best_index`` is O(1) and ``top_k`` doesn't need
+    to look at all the trials.  Trials with a NaN objective value are never
+    among the best.
+
+    Parameters
+    ----------
+    parameter_space : dict
+        The optimizer's parameter space; the columns are in its order.
+
+    minimize : bool
+        Whether lower objective values are better.
+
+    max_top_k : int
+        Number of best trials to keep in the heap; larger ``top_k`` queries
+        sort the whole objective column.
+
+    capacity : int
+        Number of rows to preallocate.
+
+    """
+
+    def __init__(self, parameter_space, minimize=True, max_top_k=100,
+                 capacity=64):
+        self.names = list(parameter_space.keys())
+        self.dtype = np.dtype(
+            [(name, _COLUMN_TYPES[spec['type']])
+             for name, spec in parameter_space.items()] +
+            [('objective', np.float64)])
+        self.minimize = minimize
+        self.max_top_k = max_top_k
+        self.size = 0
+        self._records = np.empty(capacity, dtype=self.dtype)
+        self._best_so_far = np.empty(capacity)
+        self.best_index = None
+        # Min-heap of (-key, -index) of the best trials, whose root is the
+        # worst of them, where lower keys are better and ties go to the
+        # earlier trial
+        self._top = []
+
+    def __len__(self):
+        return self.size
+
+    def _key(self, value):
+        return value if self.minimize else -value
+
+    def _reserve(self, n_rows):
+        """ Make sure there is room for ``n_rows`` more rows, doubling the
+        capacity as needed. """
+        required = self.size + n_rows
+        capacity = self._records.shape[0]
+        if required <= capacity:
+            return
+        while capacity < required:
+            capacity = max(2*capacity, 1)
+        records = np.empty(capacity, dtype=self.dtype)
+        records[:self.size] = self._records[:self.size]
+        best_so_far = np.empty(capacity)
+        best_so_far[:self.size] = self._best_so_far[:self.size]
+        self._records, self._best_so_far = records, best_so_far
+
+    def extend(self, codes, values):
+        """ Add trials.
+
+        Parameters
+        ----------
+        codes : np.ndarray
+            Encoded parameter values, shape ``(n_trials, n_parameters)``; see
+            ``SimpleSpearmint._encode_columns``.
+
+        values : np.ndarray
+            Objective values as reported, shape ``(n_trials,)``.
+
+        """
+        values = np.asarray(values, dtype=float)
+        self._reserve(values.shape[0])
+        start, end = self.size, self.size + values.shape[0]
+        records = self._records[start:end]
+        for i, name in enumerate(self.names):
+            records[name] = codes[:, i]
+        records['objective'] = values
+        # Sort keys, lower is better, with NaN values worst
+        keys = np.where(np.isnan(values), np.inf,
+                        values if self.minimize else -values)
+        if self.best_index is None:
+            best_key, best = np.inf, np.nan
+        else:
+            best = self._records['objective'][self.best_index]
+            best_key = self._key(best)
+        # Positions at which the running best improves, and for each
+        # position, the last improvement so far
+        previous = np.minimum.accumulate(np.append(best_key, keys))[:-1]
+        improved = np.flatnonzero(keys < previous)
+        last = np.full(keys.shape[0], -1)
+        last[improved] = improved
+        last = np.maximum.accumulate(last)
+        self._best_so_far[start:end] = np.where(
+            last >= 0, values[np.maximum(last, 0)], best)
+        if improved.size:
+            self.best_index = start + int(improved[-1])
+        # Only the best new trials can enter the heap
+        candidates = np.flatnonzero(~np.isnan(values))
+        if candidates.size > self.max_top_k:
+            candidates = candidates[np.argpartition(
+                keys[candidates], self.max_top_k)[:self.max_top_k]]
+        for i in candidates:
+            self._push(keys[i], start + int(i))
+        self.size = end
+
+    def append(self, codes, value):
+        """ Add a single trial; see ``extend``. """
+        self._reserve(1)
+        index = self.size
+        self._records[index] = tuple(codes) + (value,)
+        if not np.isnan(value):
+            key = self._key(value)
+            if (self.best_index is None or key < self._key(
+                    self._records['objective'][self.best_index])):
+                self.best_index = index
+            self._push(key, index)
+        self._best_so_far[index] = (
+            np.nan if self.best_index is None
+            else self._records['objective'][self.best_index])
+        self.size += 1
+
+    def _push(self, key, index):
+        """ Offer a trial to the heap of the best trials. """
+        item = (-key, -index)
+        if len(self._top) < self.max_top_k:
+            heapq.heappush(self._top, item)
+        elif item > self._top[0]:
+            heapq.heapreplace(self._top, item)
+
+    @property
+    def records(self):
+        """ View (not a copy) of the trials as a structured array. """
+        return self._records[:self.size]
+
+    @property
+    def best_so_far(self):
+        """ View of the best objective value after each trial, NaN until the
+        first non-NaN value. """
+        return self._best_so_far[:self.size]
+
+    def regret(self, optimum):
+        """ Regret curve: the distance of the best objective value after each
+        trial to the known ``optimum``. """
+        return np.abs(self.best_so_far - optimum)
+
+    def top_k(self, k):
+        """ Indices of the ``k`` best trials, best first. """
+        if k <= self.max_top_k:
+            best = sorted(self._top, reverse=True)[:k]
+            return np.array([-index for _, index in best], dtype=int)
+        keys = self.records['objective']
+        if not self.minimize:
+            keys = -keys
+        # argsort puts NaNs last
+        indices = np.argsort(keys, kind='mergesort')
+        return indices[:min(k, np.count_nonzero(~np.isnan(keys)))]
@@ -0,0 +1,261 @@
+import math
+import numpy as np
+
+
+class _Bracket(object):
+    """ Bookkeeping for one successive halving bracket of ``Hyperband``. """
+
+    def __init__(self, n_configs, budgets):
+        # Number of configurations which are evaluated on each rung
+        self.n_configs = n_configs
+        self.budgets = budgets
+        self.rung = 0
+        # Configurations of the current rung which haven't been handed out;
+        # the first rung is filled with new suggestions on demand
+        self.queue = []
+        self.n_new = n_configs[0]
+        self.n_outstanding = 0
+        # (objective value, configuration) of the current rung
+        self.results = []
+
+    @property
+    def finished(self):
+        return self.rung == len(self.budgets)
+
+    @property
+    def has_work(self):
+        return not self.finished and bool(self.queue or self.n_new)
+
+
+class Hyperband(object):
+    """ Multi-fidelity optimization with Hyperband: many configurations are
+    evaluated with a small budget (e.g. few epochs, or a fraction of the
+    data), and only the best ``1/eta`` of them are promoted to an ``eta``
+    times larger budget, until the maximum budget is reached (successive
+    halving).  Each bracket of Hyperband starts from a different budget, to
+    hedge against low budgets being misleading.
+
+    The budget is a parameter of the optimizer's parameter space, so the GP
+    models the objective as a function of both the configuration and the
+    budget, and learns from the cheap evaluations which configurations are
+    promising at the full budget.  All evaluations, at any budget, are passed
+    to ``optimizer.update``.  New configurations are suggested by the
+    optimizer, with their budget replaced by the budget of the bracket's
+    first rung.
+
+    Parameters
+    ----------
+    optimizer : SimpleSpearmint
+        The optimizer, whose parameter space includes the budget as a
+        ``'float'`` or ``'int'`` parameter; its ``'min'`` and ``'max'`` are
+        the smallest and the full budget.  Its ``pipeline`` mode isn't
+        supported.
+
+    budget : str
+        Name of the budget parameter.
+
+    eta : int
+        Fraction of configurations (``1/eta``) promoted to the next rung, and
+        factor between the budgets of successive rungs.
+
+    Examples
+    --------
+    >>> ss = SimpleSpearmint({'lr': {'type': 'float', 'min': -5, 'max': 0},
+    ...                       'epochs': {'type': 'int', 'min': 1, 'max': 27}})
+    >>> hyperband = Hyperband(ss, 'epochs')
+    >>> best_parameters, best_objective = hyperband.run(
+    ...     train_and_validate, n_brackets=8)
+
+    For asynchronous evaluation, e.g. with many workers:
+
+    >>> trial_id, parameters = hyperband.suggest()
+    >>> hyperband.update(trial_id, train_and_validate(**parameters))
+
+    """
+
+    def __init__(self, optimizer, budget='budget', eta=3):
+        spec = optimizer.parameter_space.get(budget)
+        if spec is None or spec['type'] not in ['float', 'int']:
+            raise ValueError('The parameter space needs a float or int '
+                             'parameter {} for the budget.'.format(budget))
+        if spec['min'] <= 0:
+            raise ValueError('The smallest budget must be positive.')
+        if optimizer.pipeline:
+            raise ValueError('Hyperband does not support pipeline mode.')
+        self.optimizer = optimizer
+        self.budget = budget
+        self.eta = eta
+        self.min_budget = spec['min']
+        self.max_budget = spec['max']
+        self._integer = spec['type'] == 'int'
+        # Number of successive halvings in the most exploratory bracket
+        self.s_max = int(math.floor(
+            math.log(self.max_budget/float(self.min_budget))/math.log(eta) +
+            1e-9))
+        self.brackets = []
+        self.n_brackets_started = 0
+        # Map the IDs of outstanding evaluations to their bracket and
+        # parameters
+        self.outstanding = {}
+        self._next_id = 0
+
+    def _new_bracket(self):
+        """ Start the next bracket, cycling from the most exploratory one,
+        which evaluates the most configurations with the smallest budget, to
+        the one which evaluates few configurations with the full budget. """
+        s = self.s_max - self.n_brackets_started % (self.s_max + 1)
+        n = int(math.ceil((self.s_max + 1)/float(s + 1)*self.eta**s))
+        n_configs, budgets = [], []
+        for i in range(s + 1):
+            n_configs.append(max(int(n*self.eta**-i), 1))
+            budget = self.max_budget*float(self.eta)**(i - s)
+            if self._integer:
+                budget = int(round(budget))
+            budgets.append(max(budget, self.min_budget))
+        bracket = _Bracket(n_configs, budgets)
+        self.brackets.append(bracket)
+        self.n_brackets_started += 1
+        return bracket
+
+    def _key(self, value):
+        """ Sort key of an objective value, smallest for the best value. """
+        return value if self.optimizer.minimize else -value
+
+    def suggest(self, new_bracket=True):
+        """ Get the next evaluation: a configuration to be promoted within a
+        running bracket, a new configuration, or, if all the evaluations of
+        the running brackets have been handed out, one of a new bracket.  The
+        evaluation is registered as pending with the optimizer.
+
+        Parameters
+        ----------
+        new_bracket : bool
+            Whether to start a new bracket if needed.
+
+        Returns
+        -------
+        trial : tuple or None
+            Tuple of the evaluation's ID and its parameters, including the
+            budget, or None if there's nothing to evaluate until some results
+            are reported, and ``new_bracket=False``.
+        """
+        for bracket in self.brackets:
+            if bracket.has_work:
+                break
+        else:
+            if not new_bracket:
+                return None
+            bracket = self._new_bracket()
+        if bracket.queue:
+            # Queued evaluations are already registered as pending
+            parameters = bracket.queue.pop(0)
+        else:
+            # Suggest all the new configurations of the bracket from one fit
+            suggestions = self.optimizer.suggest_batch(bracket.n_new)
+            for suggestion in suggestions:
+                self.optimizer.remove_pending(suggestion)
+                suggestion[self.budget] = bracket.budgets[0]
+                self.optimizer.add_pending(suggestion)
+            parameters = suggestions.pop(0)
+            bracket.queue = suggestions
+            bracket.n_new = 0
+        bracket.n_outstanding += 1
+        trial_id = self._next_id
+        self._next_id += 1
+        self.outstanding[trial_id] = (bracket, parameters)
+        return trial_id, parameters
+
+    def update(self, trial_id, objective_value):
+        """ Report the result of an evaluation.  Once all the evaluations of
+        a rung have been reported, the best configurations are promoted to the
+        next rung and the others are stopped.  Failed evaluations are never
+        promoted, so the next rung may be smaller, and the bracket ends if
+        they all failed.
+
+        Parameters
+        ----------
+        trial_id : int
+            ID of the evaluation, as returned by ``suggest``.
+
+        objective_value : float
+            Objective value at the evaluation's budget; NaN if it failed.
+        """
+        bracket, parameters = self.outstanding.pop(trial_id)
+        # This also removes the evaluation from the pending list
+        self.optimizer.update(parameters, objective_value)
+        bracket.n_outstanding -= 1
+        bracket.results.append((objective_value, parameters))
+        if bracket.queue or bracket.n_new or bracket.n_outstanding:
+            return
+        # The rung is complete; promote the best configurations
+        bracket.rung += 1
+        if not bracket.finished:
+            # Failed evaluations are never promoted
+            ranked = sorted([result for result in bracket.results
+                             if not np.isnan(result[0])],
+                            key=lambda result: self._key(result[0]))
+            for _, parameters in ranked[:bracket.n_configs[bracket.rung]]:
+                parameters = dict(parameters)
+                parameters[self.budget] = bracket.budgets[bracket.rung]
+                self.optimizer.add_pending(parameters)
+                bracket.queue.append(parameters)
+            if not ranked:
+                # Nothing to promote, so the bracket ends
+                bracket.rung = len(bracket.budgets)
+        bracket.results = []
+        if bracket.finished:
+            self.brackets.remove(bracket)
+
+    def run(self, objective, n_brackets):
+        """ Evaluate the brackets one evaluation at a time.
+
+        Parameters
+        ----------
+        objective : callable
+            Objective function, called as ``objective(**parameters)``, where
+            the parameters include the budget.
+
+        n_brackets : int
+            Number of brackets to run.  Hyperband cycles through ``s_max + 1``
+            different brackets.
+
+        Returns
+        -------
+        best_parameters : dict
+            Dictionary mapping parameter names to the values of the best
+            evaluation at the full budget; see ``get_best_parameters``.
+
+        best_objective : float
+            Its objective value.
+        """
+        n_started = self.n_brackets_started
+        while True:
+            trial = self.suggest(
+                self.n_brackets_started - n_started < n_brackets)
+            if trial is None:
+                break
+            trial_id, parameters = trial
+            self.update(trial_id, objective(**parameters))
+        return self.get_best_parameters()
+
+    def get_best_parameters(self):
+        """ Get the best parameters among the evaluations at the full budget,
+        or among all evaluations if none were at the full budget.
+
+        Returns
+        -------
+        best_parameters : dict
+            Dictionary mapping parameter names to the best values.
+
+        best_objective : float
+            The corresponding objective value.
+        """
+        optimizer = self.optimizer
+        values = np.array(optimizer.objective_values, dtype=float)
+        full = np.array([parameters[self.budget] >= self.max_budget
+                         for parameters in optimizer.parameter_values])
+        if np.any(full & ~np.isnan(values)):
+            values[~full] = np.nan
+        best = np.nanargmin(values)
+        sign = 1.0 if optimizer.minimize else -1.0
+        return optimizer.parameter_values[best], sign*values[best]
@@ -0,0 +1,163 @@
+import os
+import json
+import pickle
+import struct
+import numpy as np
+
+# Identifies journal files, and the version of the format
+MAGIC = b'SSJRNL01'
+
+
+class Journal(object):
+    """ Append-only binary journal of trials, so that an optimizer can be
+    resumed after its process dies (see ``SimpleSpearmint.resume``).
+
+    The file starts with ``MAGIC``, the length of a JSON header as a
+    little-endian uint64, and the JSON header, which describes the optimizer.
+    It is followed by fixed-width records of little-endian float64 values,
+    one per trial: the encoded parameter values (one per parameter, in the
+    order of ``header['names']``, with enum values given as the index of the
+    option) followed by the objective value.  Because the records have a
+    fixed width, the whole journal can be memory-mapped as a 2D array.
+
+    The model hyperparameters are snapshotted separately, to ``path +
+    '.hypers'``, by writing to a temporary file and renaming it over the
+    previous snapshot.
+
+    Parameters
+    ----------
+    path : str
+        Path of the journal file.  If it exists, new records are appended to
+        it; any partially-written trailing record is discarded.
+
+    header : dict
+        JSON-serializable description of the optimizer, which must contain
+        the key ``'names'`` listing the parameter names.  Only needed when
+        creating a new journal.
+
+    fsync : bool
+        Whether to ``os.fsync`` after every write.  Records are always flushed
+        to the OS, which protects against the process dying; syncing also
+        protects against the machine dying, but is much slower.
+
+    """
+
+    def __init__(self, path, header=None, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self.header, offset, n_records = _read_header(path)
+            # Drop a partial record left behind by a crash
+            with open(path, 'r+b') as f:
+                f.truncate(offset + n_records*self.record_size)
+        else:
+            if header is None:
+                raise ValueError('A header is needed to create a journal.')
+            self.header = header
+            header = json.dumps(header).encode('utf-8')
+            with open(path, 'wb') as f:
+                f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+        self._file = open(path, 'ab')
+
+    @property
+    def record_size(self):
+        """ Size of a record in bytes. """
+        return 8*(len(self.header['names']) + 1)
+
+    def append(self, codes, values):
+        """ Append trials to the journal.
+
+        Parameters
+        ----------
+        codes : np.ndarray
+            Encoded parameter values, shape ``(n_trials, n_parameters)``.
+
+        values : np.ndarray
+            Objective values, shape ``(n_trials,)``.
+
+        """
+        records = np.column_stack([codes, values]).astype('<f8')
+        self._file.write(records.tobytes())
+        self._sync(self._file)
+
+    def snapshot_hypers(self, hypers):
+        """ Atomically replace the snapshot of the model hyperparameters.
+
+        Parameters
+        ----------
+        hypers : dict
+            Model hyperparameters, as returned by Spearmint's chooser.
+
+        """
+        temporary_path = self.path + '.hypers.tmp'
+        with open(temporary_path, 'wb') as f:
+            pickle.dump(hypers, f, protocol=2)
+            self._sync(f)
+        os.rename(temporary_path, self.path + '.hypers')
+
+    def _sync(self, f):
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def _read_header(path):
+    """ Read a journal's header.
+
+    Returns
+    -------
+    header : dict
+        The JSON header.
+
+    offset : int
+        Offset of the first record in bytes.
+
+    n_records : int
+        Number of complete records in the journal.
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError('{} is not a journal file.'.format(path))
+        header_size, = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_size).decode('utf-8'))
+    offset = len(MAGIC) + 8 + header_size
+    record_size = 8*(len(header['names']) + 1)
+    n_records = (os.path.getsize(path) - offset)//record_size
+    return header, offset, n_records
+
+
+def read_journal(path):
+    """ Read a journal without copying its records.
+
+    Parameters
+    ----------
+    path : str
+        Path of the journal file.
+
+    Returns
+    -------
+    header : dict
+        The JSON header.
+
+    records : np.ndarray
+        Memory-mapped records, shape ``(n_trials, n_parameters + 1)``; the
+        last column holds the objective values.
+
+    hypers : dict or None
+        The latest snapshot of the model hyperparameters, if any.
+    """
+    header, offset, n_records = _read_header(path)
+    width = len(header['names']) + 1
+    if n_records > 0:
+        records = np.memmap(path, dtype='<f8', mode='r', offset=offset,
+                            shape=(n_records, width))
+    else:
+        records = np.empty((0, width))
+    hypers = None
+    if os.path.exists(path + '.hypers'):
+        with open(path + '.hypers', 'rb') as f:
+            hypers = pickle.load(f)
+    return header, records, hypers
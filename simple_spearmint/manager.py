@@ -0,0 +1,313 @@
+import os
+import copy
+import time
+import collections
+import multiprocessing
+import concurrent.futures
+from .simple_spearmint import SimpleSpearmint, _suggest_snapshot
+
+
+def _suggest_studies(optimizers):
+    """ Compute one suggestion for each of several copies of
+    ``SimpleSpearmint`` objects, so that the fits of several studies can share
+    one job on the pool.
+
+    Returns
+    -------
+    results : list
+        List of ``(suggestion, fit_state)`` tuples; see ``_suggest_snapshot``.
+    """
+    return [_suggest_snapshot(optimizer) for optimizer in optimizers]
+
+
+class _Study(object):
+    """ Bookkeeping for one study of a ``StudyManager``. """
+
+    def __init__(self, name, objective, n_trials, max_concurrent, kwargs,
+                 journal_path):
+        self.name = name
+        self.objective = objective
+        self.n_trials = n_trials
+        self.max_concurrent = max_concurrent
+        self.kwargs = kwargs
+        self.journal_path = journal_path
+        # The optimizer, or None when evicted
+        self.optimizer = None
+        # Initial design points which haven't been handed out yet
+        self.design = []
+        # Suggestions which are ready to be evaluated
+        self.ready = []
+        # Number of suggestions obtained or being computed
+        self.n_requested = 0
+        self.n_evaluating = 0
+        self.n_completed = 0
+        # Whether a fit for this study is queued or running
+        self.fitting = False
+        self.last_active = time.time()
+        # Best parameters and objective, stored when the study is evicted
+        self.best = None
+
+    @property
+    def idle(self):
+        return not (self.n_evaluating or self.ready or self.fitting)
+
+    def needs_suggestion(self):
+        return (self.n_requested < self.n_trials and
+                self.n_evaluating + len(self.ready) + self.fitting <
+                self.max_concurrent)
+
+
+class StudyManager(object):
+    """ Runs many optimization studies at once on one shared pool of worker
+    processes, which is used both to evaluate objectives and to fit the
+    studies' models.
+
+    Work is scheduled first-come, first-served across studies: evaluations of
+    suggestions which are ready are submitted first, then model fits for
+    studies which need a new suggestion.  When more studies are waiting for a
+    fit than there are free workers, their fits are batched into shared jobs.
+    Fits happen on copies of the studies' optimizers in the workers, so the
+    fitted models never occupy memory in this process.
+
+    If ``state_dir`` is given, every study keeps a journal there (see
+    ``SimpleSpearmint.resume``), and idle studies are evicted from memory,
+    least-recently-active first, whenever more than ``max_resident`` studies
+    are loaded.  Evicted studies are resumed from their journal when needed.
+
+    Parameters
+    ----------
+    n_workers : int
+        Number of worker processes.  Defaults to the number of CPUs.
+
+    state_dir : str
+        Directory for the studies' journals.
+
+    max_resident : int
+        Maximum number of studies to keep in memory; requires ``state_dir``.
+
+    max_fit_batch : int
+        Maximum number of studies whose fits share one job.
+
+    executor : concurrent.futures.Executor
+        Executor to use instead of creating a
+        ``concurrent.futures.ProcessPoolExecutor`` with ``n_workers``
+        processes.
+
+    Examples
+    --------
+    >>> manager = simple_spearmint.StudyManager(n_workers=64,
+    ...                                         state_dir='studies',
+    ...                                         max_resident=100)
+    >>> for name, objective in objectives.items():
+    ...     manager.add_study(name, parameter_space, objective, n_trials=50)
+    >>> best = manager.run()
+
+    """
+
+    def __init__(self, n_workers=None, state_dir=None, max_resident=None,
+                 max_fit_batch=8, executor=None):
+        if max_resident is not None and state_dir is None:
+            raise ValueError('Evicting studies requires a state_dir.')
+        if state_dir is not None and not os.path.isdir(state_dir):
+            os.makedirs(state_dir)
+        if n_workers is None:
+            n_workers = multiprocessing.cpu_count()
+        self.n_workers = n_workers
+        self.state_dir = state_dir
+        self.max_resident = max_resident
+        self.max_fit_batch = max_fit_batch
+        self.executor = executor
+        self.studies = collections.OrderedDict()
+
+    def add_study(self, name, parameter_space, objective, n_trials,
+                  max_concurrent=1, n_initial=0, initial_method='lhs',
+                  **kwargs):
+        """ Add a study.
+
+        Parameters
+        ----------
+        name : str
+            Unique name of the study, also used for its journal file.
+
+        parameter_space : dict
+            Parameter space; see ``SimpleSpearmint``.
+
+        objective : callable
+            Picklable objective function, called as
+            ``objective(**suggestion)``.
+
+        n_trials : int
+            Number of objective function evaluations.
+
+        max_concurrent : int
+            Maximum number of concurrent evaluations for this study.
+
+        n_initial : int
+            Number of initial trials drawn from a random design; see
+            ``SimpleSpearmint.suggest_random``.
+
+        initial_method : str
+            Method to generate the initial design with.
+
+        kwargs
+            Additional arguments for ``SimpleSpearmint``.
+
+        """
+        if name in self.studies:
+            raise ValueError('Study {} already exists.'.format(name))
+        journal_path = None
+        if self.state_dir is not None:
+            journal_path = os.path.join(self.state_dir, name + '.journal')
+        study = _Study(name, objective, n_trials, max_concurrent, kwargs,
+                       journal_path)
+        study.optimizer = SimpleSpearmint(
+            parameter_space, journal=journal_path, **kwargs)
+        if n_initial > 0:
+            study.design = study.optimizer.suggest_random(
+                min(n_initial, n_trials), method=initial_method)
+        self.studies[name] = study
+        self._evict()
+
+    def get_study(self, name):
+        """ Retrieve a study's optimizer, resuming it if it was evicted.
+
+        Parameters
+        ----------
+        name : str
+            Name of the study.
+
+        Returns
+        -------
+        optimizer : SimpleSpearmint
+            The study's optimizer.
+        """
+        return self._load(self.studies[name])
+
+    def _load(self, study):
+        if study.optimizer is None:
+            study.optimizer = SimpleSpearmint.resume(
+                study.journal_path, **study.kwargs)
+        study.last_active = time.time()
+        return study.optimizer
+
+    def _evict(self):
+        """ Evict idle studies from memory until at most ``max_resident`` are
+        loaded. """
+        if self.max_resident is None:
+            return
+        resident = [study for study in self.studies.values()
+                    if study.optimizer is not None]
+        idle = sorted([study for study in resident if study.idle],
+                      key=lambda study: study.last_active)
+        for study in idle[:max(len(resident) - self.max_resident, 0)]:
+            optimizer = study.optimizer
+            # Studies whose trials all failed have no best parameters
+            study.best = (optimizer.get_best_parameters()
+                          if optimizer.history.best_index is not None
+                          else None)
+            # Queued values aren't journaled, so keep them with the design
+            study.design[:0] = optimizer.queued_values
+            if optimizer.hypers:
+                optimizer.journal.snapshot_hypers(optimizer.hypers)
+            optimizer.journal.close()
+            study.optimizer = None
+
+    def _schedule(self, executor, running, waiting, ready):
+        """ Hand out work to free workers. """
+        # Find studies which need a new suggestion, using up queued values
+        # (e.g. from SimpleSpearmint.warm_start) and initial designs without
+        # a fit
+        for study in self.studies.values():
+            queued = (study.optimizer.queued_values
+                      if study.optimizer is not None else [])
+            while (queued or study.design) and study.needs_suggestion():
+                suggestion = (queued or study.design).pop(0)
+                self._load(study).add_pending(suggestion)
+                study.n_requested += 1
+                study.ready.append(suggestion)
+                ready.append(study)
+            if study.needs_suggestion():
+                study.fitting = True
+                study.n_requested += 1
+                waiting.append(study)
+        # Evaluations of suggestions which are ready go first
+        while ready and len(running) < self.n_workers:
+            study = ready.popleft()
+            suggestion = study.ready.pop(0)
+            future = executor.submit(study.objective, **suggestion)
+            running[future] = ('evaluate', study, suggestion)
+            study.n_evaluating += 1
+        # Spread the waiting studies' fits over the free workers
+        n_free = self.n_workers - len(running)
+        if n_free <= 0 or not waiting:
+            return
+        n_jobs = min(n_free, len(waiting))
+        batch_size = min(self.max_fit_batch, -(-len(waiting)//n_jobs))
+        for n in range(n_jobs):
+            batch = [waiting.popleft()
+                     for _ in range(min(batch_size, len(waiting)))]
+            if not batch:
+                break
+            # Fit copies, so that the studies can be updated meanwhile
+            optimizers = [copy.deepcopy(self._load(study)) for study in batch]
+            future = executor.submit(_suggest_studies, optimizers)
+            running[future] = ('fit', batch, None)
+
+    def run(self):
+        """ Run all studies to completion.
+
+        Returns
+        -------
+        best : dict
+            Dictionary mapping each study's name to its best parameters and
+            objective value, as returned by
+            ``SimpleSpearmint.get_best_parameters``.  Studies without any
+            trial with a non-NaN objective value are left out.
+        """
+        executor = self.executor
+        if executor is None:
+            executor = concurrent.futures.ProcessPoolExecutor(self.n_workers)
+        # Map futures to ('fit', studies, None) or
+        # ('evaluate', study, suggestion)
+        running = {}
+        # Studies waiting for a fit, and studies with a suggestion ready to
+        # be evaluated, in order of arrival
+        waiting = collections.deque()
+        ready = collections.deque()
+        try:
+            self._schedule(executor, running, waiting, ready)
+            while running:
+                done, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    kind, studies, suggestion = running.pop(future)
+                    if kind == 'fit':
+                        for study, (suggestion, fit_state) in zip(
+                                studies, future.result()):
+                            optimizer = self._load(study)
+                            optimizer._adopt_fit_state(fit_state)
+                            optimizer.add_pending(suggestion)
+                            study.fitting = False
+                            study.ready.append(suggestion)
+                            ready.append(study)
+                    else:
+                        # This also removes the trial from the pending list
+                        self._load(studies).update(
+                            suggestion, future.result())
+                        studies.n_evaluating -= 1
+                        studies.n_completed += 1
+                self._evict()
+                self._schedule(executor, running, waiting, ready)
+        finally:
+            for future in running:
+                future.cancel()
+            if self.executor is None:
+                executor.shutdown()
+        best = {}
+        for name, study in self.studies.items():
+            if study.optimizer is not None:
+                if study.optimizer.history.best_index is not None:
+                    best[name] = study.optimizer.get_best_parameters()
+            elif study.best is not None:
+                best[name] = study.best
+        return best
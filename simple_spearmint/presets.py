@@ -0,0 +1,99 @@
+import numpy as np
+
+# Options which are passed to Spearmint's default chooser, with Spearmint's
+# default values.  They control the optimization of the acquisition function:
+# the size of the Sobol candidate grid, how many of the best candidates are
+# refined with a local optimizer, and how many random perturbations ("spray"
+# points) of the current best are added to the candidates.
+CHOOSER_OPTIONS = {'grid_size': 20000,
+                   'grid_seed': 0,
+                   'grid_subset': 20,
+                   'num_spray': 10,
+                   'spray_std': 1e-3,
+                   'optimize_best': True,
+                   'optimize_acq': True,
+                   'parallel_opt': False,
+                   'check_grad': False}
+
+# Options which are passed to Spearmint's GP models via the task
+# configuration.  They control the MCMC sampling of the GP hyperparameters.
+MODEL_OPTIONS = {'mcmc_iters': 10,
+                 'burnin': 100,
+                 'thinning': 0,
+                 'num_fantasies': 1}
+
+# Named presets trading suggestion latency for the quality of suggestions
+PRESETS = {
+    'fast': {'grid_size': 1000,
+             'grid_subset': 5,
+             'num_spray': 5,
+             'mcmc_iters': 3,
+             'burnin': 20},
+    'balanced': {'grid_size': 20000,
+                 'grid_subset': 20,
+                 'num_spray': 10,
+                 'mcmc_iters': 10,
+                 'burnin': 100},
+    'thorough': {'grid_size': 50000,
+                 'grid_subset': 40,
+                 'num_spray': 20,
+                 'mcmc_iters': 30,
+                 'burnin': 200}}
+
+
+def adaptive_options(num_dims, n_trials):
+    """ Choose chooser and model options based on the problem size.
+
+    The candidate grid and the number of locally-optimized candidates grow
+    with the dimensionality of the search space.  The number of MCMC
+    iterations shrinks as the number of trials grows, because each iteration
+    costs O(n_trials^3) and the hyperparameter posterior becomes more
+    concentrated (and each fit is warm-started from the previous one).
+
+    Parameters
+    ----------
+    num_dims : int
+        Dimensionality of the vectorized search space.
+
+    n_trials : int
+        Number of trials the model will be fit to.
+
+    Returns
+    -------
+    options : dict
+        Dictionary of chooser and model options.
+    """
+    return {'grid_size': int(np.clip(2000*num_dims, 2000, 50000)),
+            'grid_subset': int(np.clip(4*num_dims, 5, 40)),
+            'num_spray': 10,
+            'mcmc_iters': int(np.clip(
+                np.round(30/np.sqrt(1 + n_trials/25.)), 3, 30)),
+            'burnin': int(np.clip(20*num_dims, 50, 200))}
+
+
+def split_options(options):
+    """ Split a dictionary of options into chooser and model options.
+
+    Parameters
+    ----------
+    options : dict
+        Dictionary mapping option names from ``CHOOSER_OPTIONS`` or
+        ``MODEL_OPTIONS`` to values.
+
+    Returns
+    -------
+    chooser_options : dict
+        Options for Spearmint's default chooser.
+
+    model_options : dict
+        Options for Spearmint's GP models.
+    """
+    chooser_options, model_options = {}, {}
+    for name, value in options.items():
+        if name in CHOOSER_OPTIONS:
+            chooser_options[name] = value
+        elif name in MODEL_OPTIONS:
+            model_options[name] = value
+        else:
+            raise ValueError('Unknown option {}.'.format(name))
+    return chooser_options, model_options
@@ -0,0 +1,98 @@
+import numpy as np
+
+
+class RefitPolicy(object):
+    """ Decides whether ``SimpleSpearmint`` should resample the GP
+    hyperparameters before making a suggestion.  When it doesn't, only the GP
+    posterior is updated, using the cached ``SimpleSpearmint.hypers``, which is
+    much cheaper than running MCMC over the hyperparameters.
+
+    This base class refits before every suggestion, which is Spearmint's
+    default behavior.  Subclasses override ``should_refit``.
+    """
+
+    def should_refit(self, optimizer):
+        """ Decide whether to refit the hyperparameters.
+
+        Parameters
+        ----------
+        optimizer : SimpleSpearmint
+            The optimizer which is about to make a suggestion.  Its
+            ``last_refit_size`` and ``last_fit_size`` attributes give the
+            number of trials at the last full refit and at the last fit of
+            any kind.
+
+        Returns
+        -------
+        refit : bool
+            Whether to resample the hyperparameters.
+        """
+        return True
+
+
+class RefitEvery(RefitPolicy):
+    """ Refit the hyperparameters once every ``k`` new trials.
+
+    Parameters
+    ----------
+    k : int
+        Number of trials between refits.
+    """
+
+    def __init__(self, k):
+        self.k = k
+
+    def should_refit(self, optimizer):
+        return len(optimizer.trials) - optimizer.last_refit_size >= self.k
+
+
+class RefitGeometric(RefitPolicy):
+    """ Refit the hyperparameters whenever the number of trials has grown by a
+    constant factor since the last refit, so that the number of refits grows
+    logarithmically with the number of trials.
+
+    Parameters
+    ----------
+    ratio : float
+        Growth factor of the number of trials between refits; must be greater
+        than 1.
+    """
+
+    def __init__(self, ratio=1.5):
+        if ratio <= 1:
+            raise ValueError('ratio must be greater than 1, got {}.'.format(
+                ratio))
+        self.ratio = ratio
+
+    def should_refit(self, optimizer):
+        return len(optimizer.trials) >= self.ratio*optimizer.last_refit_size
+
+
+class RefitOnLikelihood(RefitPolicy):
+    """ Refit the hyperparameters only when the trials added since the last
+    fit are poorly explained by the current model, i.e. when their mean
+    predictive log-likelihood (see
+    ``SimpleSpearmint.predictive_log_likelihood``) drops below a threshold.
+
+    Parameters
+    ----------
+    threshold : float
+        Refit when the mean predictive log-likelihood of the new trials is
+        below this value.  The log-likelihood is computed with the objective
+        rescaled to unit variance, so this is independent of the scale of the
+        objective.
+    """
+
+    def __init__(self, threshold=-2.):
+        self.threshold = threshold
+
+    def should_refit(self, optimizer):
+        log_likelihood = optimizer.predictive_log_likelihood(
+            optimizer.last_fit_size)
+        # No model to evaluate with (e.g. for a freshly copied optimizer)
+        if log_likelihood is None:
+            return True
+        # No new (non-NaN) trials, so nothing has changed
+        if np.isnan(log_likelihood):
+            return False
+        return log_likelihood < self.threshold
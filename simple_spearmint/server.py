@@ -0,0 +1,239 @@
+"""
+Suggestion server which shares one ``SimpleSpearmint`` object between many
+worker processes or containers, which connect to it with
+``simple_spearmint.SuggestionClient``.  Requires Python 3.5 or later.
+
+The server can be run from the command line on an existing journal (see
+``SimpleSpearmint.resume``)::
+
+    python -m simple_spearmint.server --journal study.journal \\
+        --socket /tmp/study.sock
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+import functools
+import threading
+import concurrent.futures
+from .simple_spearmint import SimpleSpearmint
+from .client import _to_json
+
+# Methods of SimpleSpearmint which clients may call
+METHODS = ['suggest', 'suggest_random', 'update', 'get_best_parameters']
+
+
+class SuggestionServer(object):
+    """ Serves the methods ``suggest``, ``suggest_random``, ``update`` and
+    ``get_best_parameters`` of a ``SimpleSpearmint`` object over a Unix
+    domain socket or a localhost TCP port, using newline-delimited JSON.
+
+    The optimizer's methods are run one at a time in a background thread, so
+    that the server keeps accepting requests while the model is fit.
+    ``suggest`` requests which arrive within ``coalesce_delay`` of each other,
+    or while a fit is in progress, are answered together with one call to
+    ``SimpleSpearmint.suggest_batch``, so that only one fit is needed for
+    all of them and their suggestions are diverse.  Suggestions are pending
+    until the clients report their results with ``update``, or until their
+    client disconnects.
+
+    Parameters
+    ----------
+    optimizer : SimpleSpearmint
+        The optimizer to serve.
+
+    path : str
+        Path of the Unix domain socket to listen on.  If None, listen on TCP.
+
+    host : str
+        Host to listen on for TCP.
+
+    port : int
+        Port to listen on for TCP; 0 picks a free port, which is stored in
+        ``port`` once the server is ready.
+
+    coalesce_delay : float
+        Time in seconds to wait for further ``suggest`` requests before
+        fitting.
+
+    """
+
+    def __init__(self, optimizer, path=None, host='127.0.0.1', port=0,
+                 coalesce_delay=.01):
+        self.optimizer = optimizer
+        self.path = path
+        self.host = host
+        self.port = port
+        self.coalesce_delay = coalesce_delay
+        # Set once the server is listening
+        self.ready = threading.Event()
+        self._loop = None
+        self._stop = None
+        self._fit_lock = None
+        self._executor = None
+        # Writers of the open connections
+        self._writers = set()
+        # Futures of suggest requests which haven't been batched yet
+        self._waiting = []
+
+    def run(self):
+        """ Run the server until ``stop`` is called. """
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self.serve())
+        finally:
+            loop.close()
+
+    def stop(self):
+        """ Stop the server; can be called from any thread. """
+        self._loop.call_soon_threadsafe(self._stop.set)
+
+    async def serve(self):
+        """ Coroutine which runs the server until ``stop`` is called. """
+        self._loop = asyncio.get_event_loop()
+        self._stop = asyncio.Event()
+        self._fit_lock = asyncio.Lock()
+        # A single thread, so that the optimizer is only used by one call at
+        # a time
+        self._executor = concurrent.futures.ThreadPoolExecutor(1)
+        if self.path is not None:
+            server = await asyncio.start_unix_server(self._handle, self.path)
+        else:
+            server = await asyncio.start_server(
+                self._handle, self.host, self.port)
+            self.port = server.sockets[0].getsockname()[1]
+        self.ready.set()
+        try:
+            await self._stop.wait()
+        finally:
+            server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await server.wait_closed()
+            self._executor.shutdown()
+            if self.path is not None and os.path.exists(self.path):
+                os.unlink(self.path)
+            self.ready.clear()
+
+    async def _handle(self, reader, writer):
+        """ Answer the requests of one connection in order. """
+        self._writers.add(writer)
+        # Suggestions handed out on this connection whose results haven't
+        # been reported yet
+        outstanding = []
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = {}
+                try:
+                    request = json.loads(line.decode('utf-8'))
+                    response['id'] = request.get('id')
+                    method = request['method']
+                    params = request.get('params', {})
+                    response['result'] = await self._dispatch(method, params)
+                    if method == 'suggest':
+                        outstanding.append(response['result'])
+                    elif (method == 'update' and
+                          params['parameter_values'] in outstanding):
+                        outstanding.remove(params['parameter_values'])
+                except Exception as e:
+                    response['error'] = {'type': type(e).__name__,
+                                         'message': str(e)}
+                writer.write(json.dumps(response, default=_to_json).encode(
+                    'utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+            if outstanding:
+                await self._release(outstanding)
+
+    async def _release(self, suggestions):
+        """ Remove the suggestions of a client which disconnected from the
+        pending trials, since they won't be evaluated. """
+        def release():
+            for suggestion in suggestions:
+                if suggestion in self.optimizer.pending_values:
+                    self.optimizer.remove_pending(suggestion)
+        try:
+            await self._run(release)
+        except RuntimeError:
+            # The server is stopping, and its thread has been shut down
+            release()
+
+    async def _dispatch(self, method, params):
+        if method not in METHODS:
+            raise ValueError('Unknown method {}.'.format(method))
+        if method == 'suggest':
+            return await self._suggest()
+        return await self._run(getattr(self.optimizer, method), **params)
+
+    async def _run(self, function, *args, **kwargs):
+        """ Call a function of the optimizer in the background thread. """
+        return await self._loop.run_in_executor(
+            self._executor, functools.partial(function, *args, **kwargs))
+
+    async def _suggest(self):
+        future = self._loop.create_future()
+        self._waiting.append(future)
+        # The first request of a batch schedules it
+        if len(self._waiting) == 1:
+            self._loop.create_task(self._suggest_waiting())
+        return await future
+
+    async def _suggest_waiting(self):
+        """ Answer all waiting ``suggest`` requests with one batch. """
+        await asyncio.sleep(self.coalesce_delay)
+        # Requests which arrive during the previous batch's fit join this one
+        async with self._fit_lock:
+            waiting, self._waiting = self._waiting, []
+            try:
+                suggestions = await self._run(self.optimizer.suggest_batch,
+                                              len(waiting))
+            except Exception as e:
+                for future in waiting:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+        for future, suggestion in zip(waiting, suggestions):
+            if not future.done():
+                future.set_result(suggestion)
+            else:
+                # The request was cancelled, e.g. because the server is
+                # stopping, so its suggestion won't be evaluated
+                await self._run(self.optimizer.remove_pending, suggestion)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--journal', required=True,
+                        help='Journal of the study to serve and continue.')
+    parser.add_argument('--socket', default=None,
+                        help='Path of the Unix domain socket to listen on.')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='Host to listen on when not using --socket.')
+    parser.add_argument('--port', type=int, default=0,
+                        help='Port to listen on when not using --socket.')
+    args = parser.parse_args(argv)
+    server = SuggestionServer(SimpleSpearmint.resume(args.journal),
+                              args.socket, args.host, args.port)
+    thread = threading.Thread(target=server.run)
+    thread.start()
+    server.ready.wait()
+    print('Serving {} on {}'.format(
+        args.journal, args.socket or '{}:{}'.format(args.host, server.port)))
+    try:
+        while thread.is_alive():
+            thread.join(1)
+    except KeyboardInterrupt:
+        server.stop()
+        thread.join()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,8 +1,63 @@
-import spearmint.tasks.task_group
-import spearmint.choosers.default_chooser
 import os
 import sys
+import copy
+import functools
+import threading
+import contextlib
+import collections
+import multiprocessing
+import concurrent.futures
 import numpy as np
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+from .trials import TrialStore
+from .refit import RefitPolicy
+from .presets import PRESETS, adaptive_options, split_options
+from .design import unit_design
+from .journal import Journal, read_journal
+from .stats import Stats
+from .history import TrialHistory
+from .backends import SpearmintBackend, BACKENDS
+from .evaluation import ManagedExecutor
+
+
+class _ThreadStderr(object):
+    """ Stand-in for ``sys.stderr`` which sends what each thread writes to
+    that thread's capture buffer, if it has one, and to the real stderr
+    otherwise, so that fits in concurrent threads (e.g. of ``suggest_async``
+    or ``StudyManager``) capture their own output. """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+        # Number of captures in progress, in any thread
+        self.n_captures = 0
+
+    def write(self, text):
+        buffer = getattr(self.local, 'buffer', None)
+        (self.stream if buffer is None else buffer).write(text)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+# Guards the installation of _ThreadStderr as sys.stderr
+_stderr_lock = threading.Lock()
+
+
+def _instrumented(method):
+    """ Decorator which records calls to a ``SimpleSpearmint`` method in its
+    ``stats``. """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.stats.call(method.__name__,
+                             n_trials=len(self.trials),
+                             n_pending=len(self.pending_values),
+                             num_dims=self.num_dims):
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class SimpleSpearmint(object):
@@ -27,12 +82,79 @@ class SimpleSpearmint(object):
 
     debug : bool
         Whether to allow Spearmint to print debug information to stderr.
+        Otherwise, it is captured in the records of ``stats``.
         
     minimize : bool
         Whether Spearmint should minimize the objective. Default inherited from
         the behaviour of spearmint.choosers.default_chooser is to minimize, set
         minimize=False to maximize the objective.
-        
+
+    pipeline : bool
+        When True, ``suggest`` returns a suggestion which was computed in a
+        background thread, registers it as pending and immediately starts
+        computing the next suggestion.  Model fitting then overlaps with the
+        evaluation of the objective, at the cost of each suggestion not
+        accounting for the most recent result (it is modeled as pending
+        instead).  See ``suggest_async``.
+
+    refit_policy : RefitPolicy
+        Decides when to resample the GP hyperparameters before a suggestion;
+        in between, only the GP posterior is updated using the cached
+        hyperparameters.  See ``simple_spearmint.refit``.  By default, the
+        hyperparameters are resampled before every suggestion.
+
+    preset : str
+        Named set of options for Spearmint's chooser and GP models, trading
+        suggestion latency for suggestion quality: one of ``'fast'``,
+        ``'balanced'`` or ``'thorough'`` (see
+        ``simple_spearmint.presets.PRESETS``), or ``'adaptive'``, which scales
+        the candidate grid with the dimensionality and the MCMC effort with
+        the number of trials (see
+        ``simple_spearmint.presets.adaptive_options``).
+        By default, Spearmint's defaults are used, which are the same as
+        ``'balanced'``.
+
+    options : dict
+        Chooser and model options which override those of ``preset``, e.g.
+        ``{'grid_size': 5000, 'mcmc_iters': 5}``.  Valid options are listed in
+        ``simple_spearmint.presets.CHOOSER_OPTIONS`` and
+        ``simple_spearmint.presets.MODEL_OPTIONS``.
+
+    journal : str or Journal
+        Path of a journal file to which every trial is appended as it is
+        reported, and to which the model hyperparameters are snapshotted
+        after they are resampled.  If the process dies, the optimizer can be
+        recovered with ``SimpleSpearmint.resume``.  See
+        ``simple_spearmint.journal.Journal``.
+
+    callback : callable
+        Function which is called with the instrumentation record of each call
+        to ``update``, ``update_many``, ``suggest`` and ``suggest_batch``,
+        e.g. to export timings to a metrics system.  Records are also kept in
+        ``stats``; see ``simple_spearmint.stats.Stats``.
+
+    max_fit_trials : int
+        If given, the model is fit to at most this many trials, so that the
+        cost of a suggestion stays bounded no matter how many trials there
+        are: the best trials, the most recent trials and a random sample of
+        the others (see ``simple_spearmint.trials.TrialStore.active_subset``).
+        The size of the subset is recorded as ``'active_size'`` in ``stats``.
+
+    backend : str or Backend
+        Model which makes the suggestions: ``'spearmint'`` (the default) for
+        Spearmint's GP with MCMC over the hyperparameters, or ``'numpy'`` for
+        a lightweight NumPy GP which doesn't require Spearmint (see
+        ``simple_spearmint.backends``).  Spearmint is only imported on the
+        first fit.
+
+    cache : EvaluationCache
+        Cache of the objective values of all trials, used by ``lookup`` and
+        ``optimize`` to avoid evaluating the same parameter values twice (see
+        ``simple_spearmint.cache``).  If the objective is noiseless,
+        suggestions whose value is already known are replaced by nearby
+        parameter values which haven't been evaluated yet, and repeated
+        results are not added as trials again, since duplicate inputs make
+        the GP ill-conditioned.
 
     Examples
     --------
@@ -50,12 +172,24 @@ class SimpleSpearmint(object):
     """
 
     def __init__(self, parameter_space, noiseless=False, debug=False, 
-                 minimize=True):
+                 minimize=True, pipeline=False, refit_policy=None,
+                 preset=None, options=None, journal=None, callback=None,
+                 max_fit_trials=None, backend=None, cache=None):
         # Add the 'size' key to each entry in the parameter space.
         # We assume all parameters are size 1, which is reasonable.
         for name, spec in parameter_space.items():
             spec['size'] = 1
             parameter_space[name] = spec
+        # Describes this optimizer in the header of journal files
+        header = {'names': list(parameter_space.keys()),
+                  'parameter_space': parameter_space,
+                  'noiseless': noiseless,
+                  'minimize': minimize,
+                  'preset': preset,
+                  'options': options}
+        if isinstance(backend, str):
+            header['backend'] = backend
+        self.noiseless = noiseless
         # Convert the "noiseless" bool flag to Spearmint's string semantics
         noiseless = 'NOISELESS' if noiseless else 'GAUSSIAN'
         # Names are different for noisy/noiseless in the NaN-to-constraint task
@@ -65,20 +199,319 @@ class SimpleSpearmint(object):
                                      'likelihood': noiseless},
                             'NaN': {'type': 'CONSTRAINT',
                                     'likelihood': nan_likelihood}}
-        # Create a "task group" for this experiment
-        self.task_group = spearmint.tasks.task_group.TaskGroup(
-            self.task_config, parameter_space)
-        # Use Spearmint's default chooser
-        self.chooser = spearmint.choosers.default_chooser.init({})
+        # Store the parameter specification
+        self.parameter_space = parameter_space
+        if backend is None:
+            backend = 'spearmint'
+        if isinstance(backend, str):
+            if backend not in BACKENDS:
+                raise ValueError('Backend {} is not valid.'.format(backend))
+            backend = BACKENDS[backend]()
+        self.backend = backend
+        # Per-call timings and diagnostics
+        self.stats = Stats(callbacks=None if callback is None else [callback])
         # Initialize lists of parameter and objective value trials
         self.parameter_values = []
         self.objective_values = []
+        # Encoded parameter values and objective values are stored in
+        # growable arrays, which the backend fits its model to
+        self.trials = TrialStore(len(parameter_space))
+        # Typed columns of the trials, with the best trials kept track of
+        self.history = TrialHistory(parameter_space, minimize)
+        # Trials which have been handed out but not yet reported
+        self.pending_values = []
+        # Parameter values to suggest before consulting the model, and
+        # observations of prior studies; see warm_start
+        self.queued_values = []
+        self.auxiliary = None
         # We need to persistently store the model hyperparameters
         self.hypers = None
+        if refit_policy is None:
+            refit_policy = RefitPolicy()
+        self.refit_policy = refit_policy
+        # Number of trials when the hypers were last resampled, and when the
+        # model was last fit at all
+        self.last_refit_size = 0
+        self.last_fit_size = 0
+        # Counts of full refits and of cached-hyperparameter fits
+        self.fit_counts = collections.Counter()
+        if preset not in [None, 'adaptive'] and preset not in PRESETS:
+            raise ValueError('Preset {} is not valid.'.format(preset))
+        self.preset = preset
+        self.options = {} if options is None else dict(options)
+        self.chooser_options = None
+        # Combine the preset and options for Spearmint's chooser and models
+        self._apply_options()
         self.debug = debug
         self.minimize = minimize
-        # Store the parameter specification
-        self.parameter_space = parameter_space
+        self.pipeline = pipeline
+        self.max_fit_trials = max_fit_trials
+        self.cache = cache
+        if isinstance(journal, str):
+            if os.path.exists(journal) and os.path.getsize(journal) > 0:
+                raise ValueError(
+                    'Journal {} already exists, use SimpleSpearmint.resume to '
+                    'continue it.'.format(journal))
+            journal = Journal(journal, header)
+        self.journal = journal
+        # Background executor for suggest_async, created on demand
+        self._executor = None
+        # Future for the next suggestion when pipelining
+        self._prefetched = None
+
+    def __getstate__(self):
+        # The backend's model is rebuilt from the trial arrays rather than
+        # copied, and background machinery is not copied
+        state = self.__dict__.copy()
+        # Copies don't write to the journal
+        for name in ['_executor', '_prefetched', 'journal']:
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._executor = None
+        self._prefetched = None
+        self.journal = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """ Shut down the background thread of ``suggest_async`` and the
+        backend's worker pools (see ``Backend.close``), after waiting for
+        the suggestions being computed.  The optimizer can still be used,
+        and creates them again when needed. """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self.backend.close()
+
+    @property
+    def task_group(self):
+        """ Spearmint's task group, pointed at the current trials and pending
+        trials.  Only available with the Spearmint backend. """
+        if not isinstance(self.backend, SpearmintBackend):
+            raise AttributeError(
+                'Only the Spearmint backend has a task group.')
+        return self.backend.task_group(self)
+
+    @property
+    def chooser(self):
+        """ Spearmint's default chooser.  Only available with the Spearmint
+        backend. """
+        if not isinstance(self.backend, SpearmintBackend):
+            raise AttributeError('Only the Spearmint backend has a chooser.')
+        return self.backend.chooser(self)
+
+    @property
+    def num_dims(self):
+        """ Dimensionality of the vectorized parameter space, where each enum
+        parameter has one dimension per option. """
+        return sum(len(spec['options']) if spec['type'] == 'enum' else 1
+                   for spec in self.parameter_space.values())
+
+    @classmethod
+    def resume(cls, path, **kwargs):
+        """ Recreate an optimizer from its journal, e.g. after its process
+        died.  The journal is memory-mapped and all trials are added at once,
+        the model hyperparameters are restored from their latest snapshot to
+        warm-start the next fit, and new trials are appended to the journal.
+
+        Parameters
+        ----------
+        path : str
+            Path of the journal file.
+
+        kwargs
+            Additional arguments for the constructor, e.g. ``debug`` or
+            ``refit_policy``, which aren't recorded in the journal.
+
+        Returns
+        -------
+        optimizer : SimpleSpearmint
+            The resumed optimizer.
+        """
+        header, records, hypers = read_journal(path)
+        for name in ['noiseless', 'minimize', 'preset', 'options']:
+            kwargs.setdefault(name, header[name])
+        if 'backend' in header:
+            kwargs.setdefault('backend', header['backend'])
+        # Restore the parameter order the records were written in
+        parameter_space = collections.OrderedDict(
+            (name, header['parameter_space'][name])
+            for name in header['names'])
+        optimizer = cls(parameter_space, **kwargs)
+        optimizer._extend(records[:, :-1], records[:, -1])
+        optimizer.hypers = hypers
+        optimizer.journal = Journal(path)
+        return optimizer
+
+    def warm_start(self, priors, hypers=True, top_k=0, observations=False,
+                   weight=.5):
+        """ Seed this study with the results of prior studies of a related
+        objective, e.g. of the same model tuned on older data, so that it
+        doesn't have to rediscover the good regions from scratch.
+
+        Parameters
+        ----------
+        priors : SimpleSpearmint, str or list
+            Prior studies: optimizers or paths of their journals, or a list
+            of them.  Their parameter spaces must have the same parameters
+            with the same types, but ranges and enum options may differ;
+            prior trials outside of this study's space are ignored.
+
+        hypers : bool
+            Whether to initialize ``self.hypers`` from the first prior which
+            has hyperparameters for the same backend, so that the first fit
+            starts from them (with Spearmint, this also skips the burn-in of
+            the MCMC chain).  They are mapped to this study's parameters by
+            ``Backend.transfer_hypers``: the NumPy backend matches them by
+            parameter name and enum option, while the Spearmint backend only
+            reuses them if the parameter spaces are identical, including
+            their order.  Only done if this study hasn't been fit yet.
+
+        top_k : int
+            Number of the best prior configurations (ranked by their
+            objective values, standardized per prior) which are added to
+            ``queued_values``, which ``suggest``, ``suggest_batch`` and
+            ``optimize`` hand out before consulting the model.
+
+        observations : bool
+            Whether to fit the model to the prior trials as well.  The
+            objective values of each prior are standardized separately, since
+            they may be shifted or scaled relative to this study's, and are
+            given an extra noise variance of ``1/weight - 1`` relative to the
+            signal variance, so they guide the model where this study has few
+            trials without overriding its own.  They are kept in
+            ``auxiliary``.  Only supported by backends with
+            ``supports_auxiliary``, e.g. the NumPy backend.
+
+        weight : float
+            Weight of the prior observations, in ``(0, 1]``.
+
+        """
+        if isinstance(priors, (str, SimpleSpearmint)):
+            priors = [priors]
+        if observations and not self.backend.supports_auxiliary:
+            raise ValueError('The backend does not support prior '
+                             'observations.')
+        if not 0 < weight <= 1:
+            raise ValueError('weight must be in (0, 1].')
+        ranked, auxiliary = [], []
+        for prior in priors:
+            (codes, values, prior_hypers, backend,
+             parameter_space) = self._load_prior(prior)
+            if (hypers and not self.hypers and prior_hypers and
+                    backend is type(self.backend)):
+                self.hypers = self.backend.transfer_hypers(
+                    prior_hypers, parameter_space, self)
+            if values.size == 0:
+                continue
+            # Standardize each prior's objective values separately
+            std = values.std()
+            values = (values - values.mean())/(std if std > 0 else 1.)
+            ranked.extend(zip(values.tolist(), codes))
+            auxiliary.append((codes, values))
+        if top_k > 0:
+            ranked.sort(key=lambda item: item[0])
+            # Skip configurations which were already evaluated or queued
+            seen = set(map(tuple, self.trials.inputs.tolist()))
+            n_queued = 0
+            for _, row in ranked:
+                key = tuple(row.tolist())
+                if n_queued < top_k and key not in seen:
+                    seen.add(key)
+                    self.queued_values.extend(
+                        self._decode_codes(row[np.newaxis]))
+                    n_queued += 1
+        if observations and auxiliary:
+            codes = np.vstack([codes for codes, _ in auxiliary])
+            values = np.concatenate([values for _, values in auxiliary])
+            noise = np.full(values.shape, 1./weight - 1.)
+            if self.auxiliary is not None:
+                codes = np.vstack([self.auxiliary['codes'], codes])
+                values = np.concatenate([self.auxiliary['values'], values])
+                noise = np.concatenate([self.auxiliary['noise'], noise])
+            self.auxiliary = {'codes': codes, 'values': values,
+                              'noise': noise}
+
+    def _load_prior(self, prior):
+        """ Load the trials of a prior study for ``warm_start``.
+
+        Returns
+        -------
+        codes : np.ndarray
+            Encoded parameter values of the prior's non-NaN trials which lie
+            in this study's parameter space, in this study's parameter order.
+
+        values : np.ndarray
+            Their objective values, lower being better.
+
+        hypers : dict or None
+            The prior's model hyperparameters.
+
+        backend : type or None
+            Class of the backend which fit the hyperparameters.
+
+        parameter_space : collections.OrderedDict
+            The prior's parameter space, in its parameter order.
+        """
+        if isinstance(prior, str):
+            header, records, hypers = read_journal(prior)
+            names = header['names']
+            parameter_space = collections.OrderedDict(
+                (name, header['parameter_space'][name]) for name in names)
+            codes, values = records[:, :-1], records[:, -1]
+            backend = BACKENDS.get(header.get('backend', 'spearmint'))
+        else:
+            parameter_space = prior.parameter_space
+            names = list(parameter_space.keys())
+            codes, values = prior.trials.inputs, prior.trials.values
+            hypers = prior.hypers
+            backend = type(prior.backend)
+        if sorted(names) != sorted(self.parameter_space.keys()) or any(
+                parameter_space[name]['type'] != spec['type']
+                for name, spec in self.parameter_space.items()):
+            raise ValueError('The parameter space of the prior study is not '
+                             'compatible.')
+        keep = np.logical_not(np.isnan(values))
+        columns = []
+        for name, spec in self.parameter_space.items():
+            column = codes[:, names.index(name)]
+            if spec['type'] == 'enum':
+                # Map the prior's option indices to this study's
+                options = parameter_space[name]['options']
+                mapping = np.array([
+                    spec['options'].index(option)
+                    if option in spec['options'] else -1
+                    for option in options])
+                column = mapping[column.astype(int)]
+                keep &= column >= 0
+            else:
+                keep &= (column >= spec['min']) & (column <= spec['max'])
+            columns.append(column)
+        codes = np.column_stack(columns).astype(float)
+        return codes[keep], values[keep], hypers, backend, parameter_space
+
+    def _apply_options(self):
+        """ Combine the preset and user-supplied options, and store the
+        chooser options and the model options in the task configuration. """
+        if self.preset == 'adaptive':
+            options = adaptive_options(self.num_dims, len(self.trials))
+        elif self.preset is not None:
+            options = dict(PRESETS[self.preset])
+        else:
+            options = {}
+        options.update(self.options)
+        chooser_options, model_options = split_options(options)
+        # Spearmint passes each task's options on to its model
+        for task_options in self.task_config.values():
+            task_options.update(model_options)
+        self.chooser_options = chooser_options
 
     def spec_parameter_values(self, parameter_values):
         """ Converts parameter values in the form ``{'parameter_name': value}``
@@ -100,7 +533,7 @@ class SimpleSpearmint(object):
         specd_parameter_values = {}
         for name, value in parameter_values.items():
             # Retrieve the param type string from the variable spec
-            param_type = self.task_group.variables_config[name]['type']
+            param_type = self.parameter_space[name]['type']
             # If the variable type is an enum, make the value a list
             if param_type == 'enum':
                 values = [value]
@@ -112,6 +545,7 @@ class SimpleSpearmint(object):
                                             'values': values}
         return specd_parameter_values
 
+    @_instrumented
     def update(self, parameter_values, objective_value):
         """ Update the optimizer with a new result.
 
@@ -125,89 +559,726 @@ class SimpleSpearmint(object):
             parameters.
 
         """
+        reported_value = objective_value
+        if not self.minimize:
+            objective_value = -1.0 * objective_value
+        with self.stats.phase('encode'):
+            codes = self._encode_values([parameter_values])
+        if self.cache is not None:
+            key = self.cache.key(codes[0])
+            if self.noiseless and key in self.cache:
+                # The value is already known, so don't add a duplicate input
+                self.stats.count('duplicates')
+                if parameter_values in self.pending_values:
+                    self.remove_pending(parameter_values)
+                return
+            self.cache.put(key, reported_value)
+        if self.journal is not None:
+            with self.stats.phase('journal'):
+                self.journal.append(codes, [objective_value])
         # Add this parameter setting and objective value to our list of trials
         self.parameter_values.append(parameter_values)
-        if not self.minimize:
-            self.objective_values.append(-1.0 * objective_value)
+        self.objective_values.append(objective_value)
+        self.trials.append(codes[0], objective_value)
+        self.history.append(codes[0], reported_value)
+        # This trial is no longer pending, if it was registered as such
+        if parameter_values in self.pending_values:
+            self.remove_pending(parameter_values)
+
+    @_instrumented
+    def update_many(self, parameter_values, objective_values=None,
+                    objective_name='objective'):
+        """ Update the optimizer with many results at once, e.g. to warm-start
+        it with the trials of an earlier run.  The trials are validated and
+        encoded together.
+
+        Parameters
+        ----------
+        parameter_values : list of dict, dict of np.ndarray, or str
+            Either a list of dictionaries mapping each parameter name to its
+            value, a dictionary mapping each parameter name to an array of
+            values, or the path to a ``.csv`` file (with a header row) or a
+            ``.npz`` file which has one column/array per parameter.
+
+        objective_values : np.ndarray
+            The objective function value of each trial.  When loading from a
+            file, these default to the column/array ``objective_name``.
+
+        objective_name : str
+            Name of the column/array holding the objective values in a file.
+
+        """
+        if isinstance(parameter_values, str):
+            columns = _load_columns(parameter_values)
+            if objective_values is None:
+                objective_values = columns.pop(objective_name)
+            else:
+                columns.pop(objective_name, None)
+        elif isinstance(parameter_values, dict):
+            columns = parameter_values
         else:
-            self.objective_values.append(objective_value)
-        # Update the task group with these parameter settings
-        self.task_group.inputs = np.array(
-            [self.task_group.vectorify(self.spec_parameter_values(values))
-             for values in self.parameter_values])
-        # Update the task group with the objective value
-        self.task_group.values = {
-            'main': np.array(self.objective_values),
-            # For some reason, the NaN task gets True values for non-NaN values
-            # See spearmint.tasks.TaskGroup.add_nan_task_if_nans
-            'NaN': np.logical_not(np.isnan(self.objective_values))}
+            columns = None
+        with self.stats.phase('encode'):
+            if columns is None:
+                codes = self._encode_values(parameter_values)
+            else:
+                codes = self._encode_columns(columns)
+        objective_values = np.asarray(objective_values, dtype=float)
+        if objective_values.shape != (codes.shape[0],):
+            raise ValueError('Got {} objective values for {} trials.'.format(
+                objective_values.shape[0], codes.shape[0]))
+        if not self.minimize:
+            objective_values = -1.0 * objective_values
+        if self.journal is not None:
+            with self.stats.phase('journal'):
+                self.journal.append(codes, objective_values)
+        # Build the list of dicts from the columns if we weren't given one
+        if not isinstance(parameter_values, list):
+            parameter_values = None
+        self._extend(codes, objective_values, parameter_values)
 
-    def suggest(self):
-        """ Generate a new parameter suggestion.
+    def _extend(self, codes, objective_values, parameter_values=None):
+        """ Add trials given as encoded parameter values (see
+        ``_encode_columns``) and objective values which have already been
+        negated when maximizing. """
+        if parameter_values is None:
+            parameter_values = self._decode_codes(codes)
+        self.parameter_values.extend(parameter_values)
+        self.objective_values.extend(objective_values.tolist())
+        self.trials.extend(codes, objective_values)
+        # The history and the cache hold the objective values as reported
+        sign = 1.0 if self.minimize else -1.0
+        self.history.extend(codes, sign*objective_values)
+        if self.cache is not None:
+            for row, value in zip(codes, objective_values.tolist()):
+                self.cache.put(self.cache.key(row), sign*value)
+        # Some of these trials may have been pending
+        if self.pending_values:
+            self.pending_values = [values for values in self.pending_values
+                                   if values not in parameter_values]
+
+    def _encode_columns(self, columns):
+        """ Validate columns of parameter values against the parameter space
+        and encode them as a matrix with one column per parameter (in the
+        order of ``self.parameter_space``), where enum values are replaced by
+        the index of the option.
+
+        Parameters
+        ----------
+        columns : dict
+            Dictionary mapping each parameter name to a sequence of values.
 
         Returns
         -------
-        suggestion : dict
-            Dictionary mapping parameter names to the suggested values.
+        codes : np.ndarray
+            Encoded parameter values, shape ``(n_trials, n_parameters)``.
         """
-        # When not debugging, redirect sys.stderr to devnull!
-        if not self.debug:
-            old_stderr = sys.stderr
-            sys.stderr = open(os.devnull, 'w')
-        # Update the model hyperparameters given the current trial list
-        self.hypers = self.chooser.fit(
-            self.task_group, self.hypers, self.task_config)
-        # Get a parameter suggestion
-        suggestion = self.chooser.suggest()
-        if not self.debug:
-            sys.stderr.close()
-            sys.stderr = old_stderr
-        # Convert the vector format returned by chooser.suggest() to a dict
-        suggestion = self.task_group.paramify(np.atleast_1d(suggestion))
-        # Retrieve the values, and also flatten the 1d arrays that spearmint
-        # forces you to use
-        suggestion = dict((name, value['values'][0])
-                          for name, value in suggestion.items())
-        # Force-cast parameters to their correct types
-        for name, value in suggestion.items():
-            if self.parameter_space[name]['type'] == 'int':
-                suggestion[name] = int(value)
-            if self.parameter_space[name]['type'] == 'float':
-                suggestion[name] = float(value)
-            # Ignore enums, we don't know what their type is
-        return suggestion
+        if set(columns) != set(self.parameter_space):
+            raise ValueError(
+                'Expected parameters {}, got {}.'.format(
+                    sorted(self.parameter_space), sorted(columns)))
+        names = list(self.parameter_space.keys())
+        n_trials = len(columns[names[0]])
+        codes = np.empty((n_trials, len(names)))
+        for i, name in enumerate(names):
+            spec = self.parameter_space[name]
+            column = np.asarray(columns[name])
+            if column.shape != (n_trials,):
+                raise ValueError(
+                    'Parameter {} has shape {}, expected ({},).'.format(
+                        name, column.shape, n_trials))
+            if spec['type'] == 'enum':
+                # Also match options and values by their string
+                # representation, for values which were read from a text
+                # file, where e.g. the option '1' is parsed as the int 1
+                lookup = dict((str(option), n)
+                              for n, option in enumerate(spec['options']))
+                lookup.update((option, n)
+                              for n, option in enumerate(spec['options']))
+                try:
+                    codes[:, i] = [
+                        lookup[value] if value in lookup
+                        else lookup[str(value)] for value in column.tolist()]
+                except (KeyError, TypeError):
+                    raise ValueError(
+                        'Parameter {} has values not in {}.'.format(
+                            name, spec['options']))
+                continue
+            codes[:, i] = column
+            if np.any(np.isnan(codes[:, i])) or np.any(
+                    (codes[:, i] < spec['min']) | (codes[:, i] > spec['max'])):
+                raise ValueError(
+                    'Parameter {} has values outside of [{}, {}].'.format(
+                        name, spec['min'], spec['max']))
+            if (spec['type'] == 'int' and
+                    np.any(codes[:, i] != np.round(codes[:, i]))):
+                raise ValueError(
+                    'Parameter {} has non-integer values.'.format(name))
+        return codes
 
-    def suggest_random(self):
-        """ Randomly generate a parameter suggestion.
+    def _decode_codes(self, codes):
+        """ Convert parameter values encoded by ``_encode_columns`` to a list
+        of dicts mapping parameter names to values. """
+        names = list(self.parameter_space.keys())
+        columns = []
+        for name, column in zip(names, codes.T):
+            spec = self.parameter_space[name]
+            if spec['type'] == 'float':
+                columns.append(column.tolist())
+            elif spec['type'] == 'int':
+                columns.append(column.astype(int).tolist())
+            else:
+                columns.append(
+                    [spec['options'][n] for n in column.astype(int)])
+        return [dict(zip(names, row)) for row in zip(*columns)]
 
-        Returns
-        -------
-        suggestion : dict
-            Dictionary mapping parameter names to the suggested values.
+    def _encode_values(self, parameter_values):
+        """ Encode a list of dicts mapping parameter names to values; see
+        ``_encode_columns``. """
+        try:
+            columns = dict(
+                (name, [values[name] for values in parameter_values])
+                for name in self.parameter_space)
+        except KeyError as e:
+            raise ValueError('A trial is missing parameter {}.'.format(e))
+        return self._encode_columns(columns)
+
+    def _unit_to_codes(self, unit):
+        """ Map points of the unit hypercube, with one dimension per
+        parameter, to encoded parameter values (see ``_encode_columns``).
+
+        Floats are scaled to their range.  Ints and enums divide the unit
+        interval into equal-width bins, one per integer in ``[min, max]`` or
+        per option.
         """
-        suggestion = {}
-        # Build up the random suggestion key-by-key
-        for name, spec in self.parameter_space.items():
-            # Sample floats from np.random.uniform
+        codes = np.empty(unit.shape)
+        for i, spec in enumerate(self.parameter_space.values()):
+            column = unit[:, i]
+            # Scale to the parameter's range for floats
             if spec['type'] == 'float':
-                suggestion[name] = float(np.random.uniform(
-                    low=spec['min'], high=spec['max']))
-            # Sample ints from np.random.random_integers
+                codes[:, i] = spec['min'] + column*(spec['max'] - spec['min'])
+            # For ints, give each integer in [min, max] an equal-width bin
             elif spec['type'] == 'int':
-                suggestion[name] = int(np.random.random_integers(
-                    low=spec['min'], high=spec['max']))
-            # In enum, sample from options using choice
+                codes[:, i] = np.minimum(np.floor(
+                    spec['min'] + column*(spec['max'] - spec['min'] + 1)),
+                    spec['max'])
+            # For enums, give each option an equal-width bin
             elif spec['type'] == 'enum':
-                suggestion_index = np.random.choice(len(spec['options']))
-                suggestion[name] = spec['options'][suggestion_index]
+                n_options = len(spec['options'])
+                codes[:, i] = np.minimum(np.floor(column*n_options),
+                                         n_options - 1)
             # Raise an error if another type was specified
             else:
                 raise ValueError('Parameter type {} is not valid.'.format(
                     spec['type']))
+        return codes
+
+    def _codes_to_unit(self, codes):
+        """ Map encoded parameter values to the unit hypercube; the inverse
+        of ``_unit_to_codes``, mapping ints and enums to their bin centers.
+        """
+        unit = np.empty(codes.shape)
+        for i, spec in enumerate(self.parameter_space.values()):
+            if spec['type'] == 'float':
+                width = float(spec['max'] - spec['min']) or 1.
+                unit[:, i] = (codes[:, i] - spec['min'])/width
+            elif spec['type'] == 'int':
+                unit[:, i] = ((codes[:, i] - spec['min'] + .5) /
+                              (spec['max'] - spec['min'] + 1))
+            else:
+                unit[:, i] = (codes[:, i] + .5)/len(spec['options'])
+        return unit
+
+    def lookup(self, parameter_values):
+        """ Look up the objective value of parameter values in ``cache``.
+
+        Parameters
+        ----------
+        parameter_values : dict
+            Dictionary mapping each parameter name to its value.
+
+        Returns
+        -------
+        objective_value : float or None
+            The objective value reported for these parameter values, or None
+            if they are not in the cache (or there is no cache).
+        """
+        if self.cache is None:
+            return None
+        value = self.cache.get(
+            self.cache.key(self._encode_values([parameter_values])[0]))
+        self.stats.count('cache_hits' if value is not None else
+                         'cache_misses')
+        return value
+
+    def _avoid_cached(self, suggestion):
+        """ When the objective is noiseless, replace a suggestion whose value
+        is already in the cache by the nearest of a set of random parameter
+        values which haven't been evaluated or handed out yet. """
+        if self.cache is None or not self.noiseless:
+            return suggestion
+        codes = self._encode_values([suggestion])
+        if self.cache.key(codes[0]) not in self.cache:
+            return suggestion
+        self.stats.count('resuggested')
+        candidates = [candidate for candidate in self.suggest_random(100)
+                      if self.cache.key(self._encode_values([candidate])[0])
+                      not in self.cache and
+                      candidate not in self.pending_values]
+        # The space may be exhausted
+        if not candidates:
+            return suggestion
+        distances = np.sum((self._codes_to_unit(
+            self._encode_values(candidates)) -
+            self._codes_to_unit(codes))**2, axis=1)
+        return candidates[np.argmin(distances)]
+
+    def add_pending(self, parameter_values):
+        """ Register a trial which has been handed out for evaluation but whose
+        result has not been reported yet.  The model gives pending trials
+        fantasized outcomes, so that subsequent suggestions are steered away
+        from them.
+
+        Parameters
+        ----------
+        parameter_values : dict
+            Dictionary mapping each parameter name to its value.
+
+        """
+        self.pending_values.append(parameter_values)
+
+    def remove_pending(self, parameter_values):
+        """ Remove a trial from the list of pending trials.  This is done
+        automatically when the trial's result is passed to ``update``.
+
+        Parameters
+        ----------
+        parameter_values : dict
+            Dictionary mapping each parameter name to its value.
+
+        """
+        self.pending_values.remove(parameter_values)
+
+    def clear_pending(self):
+        """ Forget about all pending trials. """
+        self.pending_values = []
+
+    @contextlib.contextmanager
+    def _quiet(self):
+        """ Context manager which captures what is written to sys.stderr in
+        the current stats record, unless debugging. """
+        if self.debug:
+            yield
+            return
+        with _stderr_lock:
+            if not isinstance(sys.stderr, _ThreadStderr):
+                sys.stderr = _ThreadStderr(sys.stderr)
+            stderr = sys.stderr
+            stderr.n_captures += 1
+        old_buffer = getattr(stderr.local, 'buffer', None)
+        buffer = stderr.local.buffer = StringIO()
+        try:
+            yield
+        finally:
+            stderr.local.buffer = old_buffer
+            if self.stats.current is not None:
+                self.stats.current['log'] = (
+                    self.stats.current.get('log', '') + buffer.getvalue())
+            with _stderr_lock:
+                stderr.n_captures -= 1
+                # Restore the real stderr once no thread captures anymore
+                if stderr.n_captures == 0 and sys.stderr is stderr:
+                    sys.stderr = stderr.stream
+
+    def _fit(self, fit_hypers=None):
+        """ Fit the backend's model to the current trials and pending trials.
+
+        Parameters
+        ----------
+        fit_hypers : bool
+            When False, the GP hyperparameters are not resampled; only the
+            posterior is recomputed using the stored ``self.hypers``.  By
+            default, ``self.refit_policy`` decides.
+
+        """
+        # We can't reuse hypers which haven't been fit yet
+        if not self.hypers:
+            fit_hypers = True
+        elif fit_hypers is None:
+            with self.stats.phase('refit_policy'):
+                fit_hypers = self.refit_policy.should_refit(self)
+        if fit_hypers:
+            self.last_refit_size = len(self.trials)
+            self.fit_counts['full'] += 1
+            self.stats.count('full_fits')
+        else:
+            self.fit_counts['cached'] += 1
+            self.stats.count('cached_fits')
+        self.last_fit_size = len(self.trials)
+        # The adaptive preset depends on the number of trials
+        if self.preset == 'adaptive':
+            self._apply_options()
+        indices = None
+        if (self.max_fit_trials is not None and
+                len(self.trials) > self.max_fit_trials):
+            # Fit to a bounded subset of the trials
+            with self.stats.phase('active_subset'):
+                indices = self.trials.active_subset(self.max_fit_trials)
+        self.stats.set('active_size', len(self.trials) if indices is None
+                       else indices.shape[0])
+        self.hypers = self.backend.fit(self, indices, fit_hypers)
+        if fit_hypers and self.journal is not None:
+            with self.stats.phase('journal'):
+                self.journal.snapshot_hypers(self.hypers)
+
+    def _backend_suggest(self):
+        """ Get a suggestion from the backend's model. """
+        self.stats.count('n_suggestions')
+        return self._avoid_cached(self.backend.suggest(self))
+
+    def predictive_log_likelihood(self, start=0):
+        """ Compute the mean log-likelihood of trials under the predictive
+        distribution of the model from the most recent fit.  This measures how
+        well trials which were added after that fit are explained by it.
+
+        The objective is rescaled to unit variance first, so that the result
+        does not depend on the scale of the objective.
+
+        Parameters
+        ----------
+        start : int
+            Index of the first trial to evaluate, e.g. ``self.last_fit_size``
+            to evaluate the trials added since the last fit.
+
+        Returns
+        -------
+        log_likelihood : float or None
+            Mean predictive log-likelihood of the non-NaN trials, NaN if there
+            are none, or None if there is no fitted model.
+        """
+        valid = self.trials.valid[start:]
+        prediction = self.backend.predict(
+            self, self.trials.inputs[start:][valid])
+        if prediction is None:
+            return None
+        if not np.any(valid):
+            return np.nan
+        values = self.trials.values[start:][valid]
+        mean, variance = prediction
+        scale = np.std(self.trials.values[self.trials.valid])
+        if scale > 0:
+            values, mean, variance = (
+                values/scale, mean/scale, variance/scale**2)
+        variance = np.maximum(variance, 1e-10)
+        return np.mean(-.5*np.log(2*np.pi*variance)
+                       - .5*(values - mean)**2/variance)
+
+    @_instrumented
+    def suggest(self):
+        """ Generate a new parameter suggestion.
+
+        Returns
+        -------
+        suggestion : dict
+            Dictionary mapping parameter names to the suggested values.
+        """
+        if self.queued_values:
+            suggestion = self.queued_values.pop(0)
+            if self.pipeline:
+                self.add_pending(suggestion)
+            return suggestion
+        if self.pipeline:
+            return self._suggest_pipelined()
+        with self._quiet():
+            # Update the model hyperparameters given the current trial list
+            self._fit()
+            # Get a parameter suggestion
+            return self._backend_suggest()
+
+    def suggest_async(self, executor=None):
+        """ Start computing a parameter suggestion in the background.
+
+        The model is fit to a snapshot of the current trials and pending
+        trials, so results passed to ``update`` after calling this method are
+        not taken into account by the suggestion.  Once the suggestion has
+        been computed, the fitted hyperparameters are stored in
+        ``self.hypers`` to warm-start subsequent fits.
+
+        Parameters
+        ----------
+        executor : concurrent.futures.Executor
+            Executor to compute the suggestion with.  A process pool may be
+            used to avoid contention for the GIL.  By default, a single
+            background thread owned by this object is used.
+
+        Returns
+        -------
+        future : concurrent.futures.Future
+            Future whose result is a dictionary mapping parameter names to the
+            suggested values.  If there are ``queued_values``, the first one
+            is removed from them and the future is already done.
+        """
+        if self.queued_values:
+            future = concurrent.futures.Future()
+            future.set_result(self.queued_values.pop(0))
+            return future
+        if executor is None:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(1)
+            executor = self._executor
+        # Fit a copy so that update() can proceed while the fit is running
+        result = executor.submit(_suggest_snapshot, copy.deepcopy(self))
+        future = concurrent.futures.Future()
+
+        def done(result):
+            if result.exception() is not None:
+                future.set_exception(result.exception())
+                return
+            suggestion, fit_state = result.result()
+            self._adopt_fit_state(fit_state)
+            future.set_result(suggestion)
+
+        result.add_done_callback(done)
+        return future
+
+    def _adopt_fit_state(self, fit_state):
+        """ Keep the fitted hypers, refit bookkeeping and stats records of a
+        copy of this object which made a suggestion (see
+        ``_suggest_snapshot``). """
+        self.hypers = fit_state['hypers']
+        self.last_refit_size = fit_state['last_refit_size']
+        self.last_fit_size = fit_state['last_fit_size']
+        self.fit_counts.update(fit_state['fit_counts'])
+        for record in fit_state['records']:
+            record['call'] = 'suggest_async'
+            self.stats.add(record)
+        if fit_state['fit_counts']['full'] and self.journal is not None:
+            self.journal.snapshot_hypers(self.hypers)
+
+    def _suggest_pipelined(self):
+        """ Return the suggestion computed in the background, register it as
+        pending and start computing the next one. """
+        if self._prefetched is None:
+            self._prefetched = self.suggest_async()
+        with self.stats.phase('wait'):
+            suggestion = self._prefetched.result()
+        self.add_pending(suggestion)
+        # The next fit will run while this suggestion is being evaluated
+        self._prefetched = self.suggest_async()
         return suggestion
 
+    @_instrumented
+    def suggest_batch(self, k):
+        """ Generate ``k`` parameter suggestions to be evaluated in parallel.
+
+        The GP hyperparameters are only fit once.  After each suggestion is
+        made, it is registered as pending (see ``add_pending``) and the GP
+        posterior is recomputed with a fantasized outcome for it, which
+        steers the next suggestion elsewhere.  The suggestions remain pending
+        until their results are passed to ``update``.
+
+        Parameters
+        ----------
+        k : int
+            Number of suggestions to generate.
+
+        Returns
+        -------
+        suggestions : list of dict
+            List of dictionaries mapping parameter names to the suggested
+            values.
+        """
+        # Hand out the queued parameter values first
+        suggestions = self.queued_values[:k]
+        del self.queued_values[:k]
+        for suggestion in suggestions:
+            self.add_pending(suggestion)
+        with self._quiet():
+            for n in range(k - len(suggestions)):
+                # At most the first fit resamples the hyperparameters
+                self._fit(None if n == 0 else False)
+                suggestion = self._backend_suggest()
+                with self.stats.phase('pending'):
+                    self.add_pending(suggestion)
+                suggestions.append(suggestion)
+        return suggestions
+
+    def optimize(self, objective, n_trials, n_workers=None, executor=None,
+                 n_initial=0, initial_method='lhs', timeout=None,
+                 max_memory=None):
+        """ Optimize an objective function by evaluating it asynchronously in
+        parallel.
+
+        Initially, one suggestion is made for each worker.  Whenever a worker
+        finishes, its result is passed to ``update`` and a new suggestion is
+        immediately handed to it.  Trials which are being evaluated are
+        registered as pending, so that concurrent suggestions are diverse.
+
+        Parameters
+        ----------
+        objective : callable
+            Objective function, called as ``objective(**suggestion)``.  It must
+            return a scalar value.  When using a process pool, it must be
+            picklable (e.g. defined at the top level of a module).
+
+        n_trials : int
+            Total number of suggestions to make.  Suggestions whose objective
+            value is already in ``cache`` are neither evaluated nor added as
+            trials again.
+
+        n_workers : int
+            Maximum number of concurrent evaluations.  Defaults to the number
+            of CPUs.
+
+        executor : concurrent.futures.Executor
+            Executor to evaluate the objective with.  By default, a
+            ``concurrent.futures.ProcessPoolExecutor`` with ``n_workers``
+            processes is created and shut down when done.
+
+        n_initial : int
+            Number of trials to seed the optimizer with, drawn from a design
+            generated by ``suggest_random`` before the model is used.  These
+            don't require any model fits, so they fill the workers right away.
+
+        initial_method : str
+            Method to generate the initial design with; see
+            ``suggest_random``.
+
+        timeout : float
+            If given, each evaluation runs in its own subprocess, which is
+            killed after ``timeout`` seconds, and trials which time out,
+            crash or raise are recorded with a NaN objective value; see
+            ``simple_spearmint.evaluation.ManagedExecutor``.  The time of the
+            study is then bounded by about
+            ``n_trials/n_workers*timeout``.  To inspect the failures, pass a
+            ``ManagedExecutor`` as ``executor`` instead.
+
+        max_memory : int
+            If given, each evaluation runs in its own subprocess, whose
+            address space is limited to ``max_memory`` bytes, as with
+            ``timeout``.
+
+        Returns
+        -------
+        best_parameters : dict
+            Dictionary mapping parameter names to the values corresponding to
+            the best trial so far; see ``get_best_parameters``.
+
+        objective_value : float
+            The best objective function value achieved.
+        """
+        if n_workers is None:
+            n_workers = multiprocessing.cpu_count()
+        managed = timeout is not None or max_memory is not None
+        if managed and executor is not None:
+            raise ValueError('Pass timeout and max_memory to a '
+                             'ManagedExecutor instead of an executor.')
+        own_executor = executor is None
+        if managed:
+            executor = ManagedExecutor(n_workers, timeout, max_memory)
+        elif own_executor:
+            executor = concurrent.futures.ProcessPoolExecutor(n_workers)
+        # Map futures to the parameter values they are evaluating
+        in_flight = {}
+        # Initial design which is used up before suggesting from the model
+        design = []
+        if n_initial > 0:
+            design = self.suggest_random(min(n_initial, n_trials),
+                                         method=initial_method)
+
+        def submit(n_suggestions):
+            suggestions = design[:n_suggestions]
+            del design[:n_suggestions]
+            for suggestion in suggestions:
+                self.add_pending(suggestion)
+            # Suggest in a batch, so that only one fit is needed
+            if len(suggestions) < n_suggestions:
+                suggestions += self.suggest_batch(
+                    n_suggestions - len(suggestions))
+            for suggestion in suggestions:
+                if self.lookup(suggestion) is None:
+                    future = executor.submit(objective, **suggestion)
+                    in_flight[future] = suggestion
+                else:
+                    # The result is already known, so neither evaluate it
+                    # again nor add it as another trial, which would give the
+                    # GP a duplicate input
+                    self.remove_pending(suggestion)
+            return n_suggestions
+
+        try:
+            n_submitted = 0
+            while True:
+                # Give every free worker something to do
+                n_new = min(n_workers - len(in_flight),
+                            n_trials - n_submitted)
+                if n_new > 0:
+                    n_submitted += submit(n_new)
+                if not in_flight:
+                    # Unless all the suggestions were answered by the cache
+                    if n_submitted >= n_trials:
+                        break
+                    continue
+                done, _ = concurrent.futures.wait(
+                    in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    suggestion = in_flight.pop(future)
+                    try:
+                        value = future.result()
+                    except BaseException:
+                        self.remove_pending(suggestion)
+                        raise
+                    # This also removes the trial from the pending list
+                    self.update(suggestion, value)
+        finally:
+            # If something went wrong, don't leave in-flight trials pending
+            for future, suggestion in in_flight.items():
+                future.cancel()
+                self.remove_pending(suggestion)
+            if own_executor:
+                executor.shutdown()
+        return self.get_best_parameters()
+
+    def suggest_random(self, n=None, method='uniform', seed=None):
+        """ Randomly generate parameter suggestions.
+
+        The suggestions are generated as a design in the unit hypercube, with
+        one dimension per parameter, which is then mapped to the parameter
+        values in bulk.
+
+        Parameters
+        ----------
+        n : int
+            Number of suggestions to generate.  By default, a single
+            suggestion is returned rather than a list.
+
+        method : str
+            ``'uniform'`` for independent uniform samples, or ``'sobol'`` or
+            ``'lhs'`` (Latin hypercube) for designs which cover the parameter
+            space more evenly, which makes them a better choice to seed the
+            optimizer with.
+
+        seed : int
+            Seed for the random number generator.  By default, ``np.random``
+            is used.
+
+        Returns
+        -------
+        suggestion : dict or list of dict
+            Dictionary mapping parameter names to the suggested values, or a
+            list of ``n`` of them.
+        """
+        design = unit_design(1 if n is None else n,
+                             len(self.parameter_space), method, seed)
+        suggestions = self._decode_codes(self._unit_to_codes(design))
+        if n is None:
+            return suggestions[0]
+        return suggestions
+
     def get_best_parameters(self):
         """ Retrieve the best parameter values and objective for all trials.
+        The best trial is kept track of in ``history``, so this takes
+        constant time.
 
         Returns
         -------
@@ -219,11 +1290,75 @@ class SimpleSpearmint(object):
             The best objective function value achieved, which is the
             minimum of objective function, unless self.maximize=True
         """
-        # Retrieve the index of the lowest objective value
-        best_objective = np.nanargmin(self.objective_values)
-        if not self.minimize:
-            best_objective_value = -1.0 * self.objective_values[best_objective]
-        else:
-            best_objective_value = self.objective_values[best_objective]
-        return (self.parameter_values[best_objective],
-                best_objective_value)
+        best = self.history.best_index
+        if best is None:
+            raise ValueError('There are no trials with a non-NaN objective '
+                             'value.')
+        return (self.parameter_values[best],
+                float(self.history.records['objective'][best]))
+
+    def top_k(self, k):
+        """ Retrieve the ``k`` best trials, best first; see
+        ``simple_spearmint.history.TrialHistory``.
+
+        Parameters
+        ----------
+        k : int
+            Number of trials.
+
+        Returns
+        -------
+        trials : list of tuple
+            ``(parameter_values, objective_value)`` of at most ``k`` trials
+            with non-NaN objective values.
+        """
+        objective = self.history.records['objective']
+        return [(self.parameter_values[index], float(objective[index]))
+                for index in self.history.top_k(k)]
+
+
+def _suggest_snapshot(optimizer):
+    """ Compute a suggestion from a copy of a ``SimpleSpearmint`` object, for
+    use by ``SimpleSpearmint.suggest_async``.
+
+    Returns
+    -------
+    suggestion : dict
+        Dictionary mapping parameter names to the suggested values.
+
+    fit_state : dict
+        The state of the copy after fitting, to be passed to the original's
+        ``_adopt_fit_state``.  Its fit counts and stats records only cover
+        this suggestion.
+    """
+    optimizer.pipeline = False
+    # Queued values are handed out by the original, not by its copies
+    optimizer.queued_values = []
+    optimizer.fit_counts = collections.Counter()
+    suggestion = optimizer.suggest()
+    return suggestion, {'hypers': optimizer.hypers,
+                        'last_refit_size': optimizer.last_refit_size,
+                        'last_fit_size': optimizer.last_fit_size,
+                        'fit_counts': optimizer.fit_counts,
+                        'records': list(optimizer.stats.records)}
+
+
+def _load_columns(path):
+    """ Load columns of trial data from a ``.csv`` file with a header row or
+    a ``.npz`` file, for ``SimpleSpearmint.update_many``.
+
+    Returns
+    -------
+    columns : dict
+        Dictionary mapping column names to arrays.
+    """
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            return dict((name, data[name]) for name in data.files)
+    elif path.endswith('.csv'):
+        data = np.atleast_1d(np.genfromtxt(
+            path, delimiter=',', names=True, dtype=None, encoding='utf-8'))
+        return dict((name, data[name]) for name in data.dtype.names)
+    else:
+        raise ValueError('Can only load trials from .csv or .npz files, '
+                         'got {}.'.format(path))
@@ -0,0 +1,154 @@
+import time
+import timeit
+import collections
+import contextlib
+import numpy as np
+
+
+class Stats(object):
+    """ Per-call instrumentation of a ``SimpleSpearmint`` object.
+
+    Every call to ``update``, ``update_many``, ``suggest`` and
+    ``suggest_batch`` produces a record, which is a dict with the keys
+
+    ``'call'``
+        Name of the method.
+    ``'time'``
+        Unix timestamp of the start of the call.
+    ``'duration'``
+        Wall-clock duration of the call in seconds.
+    ``'phases'``
+        Dict mapping phase names (e.g. ``'fit'``, ``'suggest'``,
+        ``'encode'``, ``'journal'``) to their total duration in seconds.
+    ``'n_trials'``, ``'n_pending'``, ``'num_dims'``
+        Number of trials and pending trials at the start of the call, and the
+        dimensionality of the vectorized search space.
+
+    and for calls which fit the model, the number of full and cached fits
+    (``'full_fits'``, ``'cached_fits'``), the number of MCMC iterations
+    requested for the GP hyperparameters (``'mcmc_iters'``, 0 for cached
+    fits), the number of trials the model was fit to (``'active_size'``), the
+    number of candidates the acquisition function was evaluated on
+    (``'grid_size'``), the number of suggestions made by the chooser
+    (``'n_suggestions'``) and, when not debugging, whatever Spearmint wrote to
+    stderr (``'log'``).
+
+    Parameters
+    ----------
+    max_records : int
+        Maximum number of records to keep; older records are discarded.
+
+    callbacks : list of callable
+        Functions which are called with each record once its call finishes.
+
+    """
+
+    def __init__(self, max_records=10000, callbacks=None):
+        self.records = collections.deque(maxlen=max_records)
+        self.callbacks = [] if callbacks is None else list(callbacks)
+        # The record of the call in progress, if any
+        self.current = None
+
+    def __getstate__(self):
+        # Callbacks may not be picklable, and copies (e.g. those made by
+        # SimpleSpearmint.suggest_async) only need to record their own calls
+        state = self.__dict__.copy()
+        state['callbacks'] = []
+        state['records'] = collections.deque(maxlen=self.records.maxlen)
+        state['current'] = None
+        return state
+
+    @contextlib.contextmanager
+    def call(self, name, **info):
+        """ Context manager which records a call.  Nested calls are recorded
+        as part of the outermost call.
+
+        Parameters
+        ----------
+        name : str
+            Name of the call.
+
+        info
+            Additional entries for the record.
+
+        """
+        if self.current is not None:
+            yield self.current
+            return
+        record = {'call': name, 'time': time.time(), 'phases': {}}
+        record.update(info)
+        self.current = record
+        start = timeit.default_timer()
+        try:
+            yield record
+        finally:
+            record['duration'] = timeit.default_timer() - start
+            self.current = None
+        self.add(record)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """ Context manager which adds the time spent in it to phase ``name``
+        of the call in progress. """
+        start = timeit.default_timer()
+        try:
+            yield
+        finally:
+            if self.current is not None:
+                phases = self.current['phases']
+                phases[name] = (phases.get(name, 0.) +
+                                timeit.default_timer() - start)
+
+    def count(self, name, value=1):
+        """ Add ``value`` to the entry ``name`` of the call in progress. """
+        if self.current is not None:
+            self.current[name] = self.current.get(name, 0) + value
+
+    def set(self, name, value):
+        """ Set the entry ``name`` of the call in progress to ``value``. """
+        if self.current is not None:
+            self.current[name] = value
+
+    def add(self, record):
+        """ Store a finished record and pass it to the callbacks. """
+        self.records.append(record)
+        for callback in self.callbacks:
+            callback(record)
+
+    def summary(self, prefix='simple_spearmint'):
+        """ Summarize the records as a flat dictionary of metrics, named
+        ``prefix.call.metric`` and ``prefix.call.phase.metric``, which can be
+        exported as e.g. gauges.  The metrics are ``count``, ``total``,
+        ``mean``, ``p50``, ``p95`` and ``max`` of the durations in seconds,
+        as well as ``n_trials``, the number of trials at the last call.
+
+        Parameters
+        ----------
+        prefix : str
+            Prefix of the metric names.
+
+        Returns
+        -------
+        summary : dict
+            Dictionary mapping metric names to values.
+        """
+        durations = collections.defaultdict(list)
+        n_trials = {}
+        for record in self.records:
+            key = '{}.{}'.format(prefix, record['call'])
+            durations[key].append(record['duration'])
+            for phase, duration in record['phases'].items():
+                durations['{}.{}'.format(key, phase)].append(duration)
+            n_trials[key] = record.get('n_trials', 0)
+        summary = {}
+        for key, values in durations.items():
+            values = np.array(values)
+            summary[key + '.count'] = values.size
+            summary[key + '.total'] = values.sum()
+            summary[key + '.mean'] = values.mean()
+            summary[key + '.p50'] = np.percentile(values, 50)
+            summary[key + '.p95'] = np.percentile(values, 95)
+            summary[key + '.max'] = values.max()
+        for key, value in n_trials.items():
+            summary[key + '.n_trials'] = value
+        return summary
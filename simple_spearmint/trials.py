@@ -0,0 +1,148 @@
+import numpy as np
+
+
+class TrialStore(object):
+    """ Growable, array-backed storage for trial inputs and objective values.
+
+    ``SimpleSpearmint.trials`` stores the encoded parameter values, with one
+    column per parameter (see ``SimpleSpearmint._encode_columns``), and the
+    Spearmint backend keeps Spearmint's vectorized inputs of the same trials
+    in another store.
+
+    Rows are written into preallocated arrays whose capacity doubles whenever
+    it is exhausted, so appending a trial costs amortized O(1) instead of
+    rebuilding the whole input matrix.
+
+    Parameters
+    ----------
+    num_dims : int
+        Number of columns of the inputs, e.g. ``len(parameter_space)`` for
+        encoded parameter values or ``task_group.num_dims`` for vectorized
+        inputs.
+
+    capacity : int
+        Number of rows to preallocate.
+
+    """
+
+    def __init__(self, num_dims, capacity=64):
+        self.num_dims = num_dims
+        self.size = 0
+        self._inputs = np.empty((capacity, num_dims))
+        self._values = np.empty(capacity)
+        # Spearmint's NaN constraint task is True for non-NaN values, so we
+        # maintain it incrementally alongside the values
+        self._valid = np.empty(capacity, dtype=bool)
+
+    def __len__(self):
+        return self.size
+
+    def _reserve(self, n_rows):
+        """ Make sure there is room for ``n_rows`` more rows, growing the
+        arrays geometrically if needed. """
+        required = self.size + n_rows
+        capacity = self._values.shape[0]
+        if required <= capacity:
+            return
+        # Double the capacity until the new rows fit
+        while capacity < required:
+            capacity = max(2*capacity, 1)
+        inputs = np.empty((capacity, self.num_dims))
+        inputs[:self.size] = self._inputs[:self.size]
+        values = np.empty(capacity)
+        values[:self.size] = self._values[:self.size]
+        valid = np.empty(capacity, dtype=bool)
+        valid[:self.size] = self._valid[:self.size]
+        self._inputs, self._values, self._valid = inputs, values, valid
+
+    def append(self, input_vector, value):
+        """ Add a single trial.
+
+        Parameters
+        ----------
+        input_vector : np.ndarray
+            Inputs of the trial, shape ``(num_dims,)``.
+
+        value : float
+            Objective value for this trial.
+
+        """
+        self._reserve(1)
+        self._inputs[self.size] = input_vector
+        self._values[self.size] = value
+        self._valid[self.size] = not np.isnan(value)
+        self.size += 1
+
+    def extend(self, inputs, values):
+        """ Add many trials at once.
+
+        Parameters
+        ----------
+        inputs : np.ndarray
+            Inputs of the trials, shape ``(n_trials, num_dims)``.
+
+        values : np.ndarray
+            Objective values, shape ``(n_trials,)``.
+
+        """
+        values = np.asarray(values, dtype=float)
+        self._reserve(values.shape[0])
+        end = self.size + values.shape[0]
+        self._inputs[self.size:end] = inputs
+        self._values[self.size:end] = values
+        self._valid[self.size:end] = np.logical_not(np.isnan(values))
+        self.size = end
+
+    @property
+    def inputs(self):
+        """ View of the stored input vectors, shape ``(size, num_dims)``. """
+        return self._inputs[:self.size]
+
+    @property
+    def values(self):
+        """ View of the stored objective values, shape ``(size,)``. """
+        return self._values[:self.size]
+
+    @property
+    def valid(self):
+        """ View of a boolean array which is True for non-NaN values. """
+        return self._valid[:self.size]
+
+    def active_subset(self, max_size, best_fraction=.5, recent_fraction=.25):
+        """ Select at most ``max_size`` trials to fit a model to, so that the
+        cost of fitting stays bounded as the number of trials grows.
+
+        The subset consists of the trials with the lowest objective values,
+        which keep the model accurate where it matters for the acquisition
+        function, the most recent trials, and a uniform random sample of the
+        remaining trials, which keeps the rest of the space covered.
+
+        Parameters
+        ----------
+        max_size : int
+            Maximum number of trials to select.
+
+        best_fraction : float
+            Fraction of ``max_size`` to fill with the best trials.
+
+        recent_fraction : float
+            Fraction of ``max_size`` to fill with the most recent trials.
+
+        Returns
+        -------
+        indices : np.ndarray
+            Sorted indices of the selected trials.
+        """
+        if self.size <= max_size:
+            return np.arange(self.size)
+        n_best = int(best_fraction*max_size)
+        n_recent = int(recent_fraction*max_size)
+        selected = np.zeros(self.size, dtype=bool)
+        # NaN values are never among the best
+        values = np.where(self.valid, self.values, np.inf)
+        selected[np.argpartition(values, n_best)[:n_best]] = True
+        selected[self.size - n_recent:] = True
+        rest = np.flatnonzero(np.logical_not(selected))
+        selected[np.random.choice(rest, max_size - selected.sum(),
+                                  replace=False)] = True
+        return np.flatnonzero(selected)
@@ -1,11 +1,29 @@
-from simple_spearmint import SimpleSpearmint
+from simple_spearmint import (SimpleSpearmint, RefitEvery, StudyManager,
+                              SuggestionClient, FileQueueDriver,
+                              FileQueueWorker, EvaluationCache,
+                              ManagedExecutor, Hyperband, SpearmintBackend,
+                              NumpyBackend)
 import numpy as np
+import collections
+import concurrent.futures
+import copy
+import os
+import multiprocessing
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import warnings
 
 
 # Define an objective function, must return a scalar value
 def squared(x):
     return x ** 2
 
+def failing(x):
+    return np.nan
+
 def negative_squared(x):
     return -1.0 * (x ** 2)
 
@@ -41,5 +59,698 @@ def test_maximize():
     # test to see if the best params are roughly equal
     assert(np.allclose(np.asarray([best_min_parameters['x']]), np.asarray([best_max_parameters['x']])))
     
+
+# test that incrementally updating the task group gives the same inputs and
+# values as vectorizing every trial from scratch
+def test_incremental_update():
+    ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3},
+                          'y': {'type': 'int', 'min': 0, 'max': 3},
+                          'z': {'type': 'enum', 'options': ['a', 'b']}})
+    for n in range(100):
+        suggestion = ss.suggest_random()
+        # Include some failed trials to exercise the NaN task
+        value = np.nan if n % 7 == 0 else np.random.randn()
+        ss.update(suggestion, value)
+
+    expected_inputs = np.array(
+        [ss.task_group.vectorify(ss.spec_parameter_values(values))
+         for values in ss.parameter_values])
+    assert np.allclose(ss.task_group.inputs, expected_inputs)
+    assert np.allclose(ss.task_group.values['main'], ss.objective_values,
+                       equal_nan=True)
+    assert np.all(ss.task_group.values['NaN'] ==
+                  np.logical_not(np.isnan(ss.objective_values)))
+
+# test that batch suggestions are tracked as pending until they are reported
+def test_suggest_batch():
+    ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3}})
+    for n in range(5):
+        suggestion = ss.suggest_random()
+        ss.update(suggestion, squared(**suggestion))
+
+    batch = ss.suggest_batch(4)
+    assert len(batch) == 4
+    assert ss.pending_values == batch
+    assert ss.task_group.pending.shape[0] == 4
+    for suggestion in batch:
+        ss.update(suggestion, squared(**suggestion))
+    assert ss.pending_values == []
+    assert ss.task_group.pending.shape[0] == 0
+
+# test the parallel optimization driver
+def test_optimize():
+    ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3}})
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        best_parameters, best_objective = ss.optimize(
+            squared, 20, n_workers=4, executor=executor)
+    assert len(ss.objective_values) == 20
+    assert ss.pending_values == []
+    assert best_objective == np.min(ss.objective_values)
+
+def _raises(x):
+    raise ValueError(x)
+
+# test that trials whose evaluation raises don't stay pending
+def test_optimize_error():
+    ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3}})
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        try:
+            ss.optimize(_raises, 4, n_workers=2, executor=executor)
+            assert False
+        except ValueError:
+            pass
+    assert ss.pending_values == []
+    assert ss.task_group.pending.shape[0] == 0
+
+# test that pipelined suggestions are computed in the background and tracked
+# as pending until they are reported
+def test_pipeline():
+    ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3}},
+                         pipeline=True)
+    for n in range(10):
+        suggestion = ss.suggest()
+        assert ss.pending_values == [suggestion]
+        ss.update(suggestion, squared(**suggestion))
+    assert ss.pending_values == []
+    assert ss.hypers is not None
+    assert 'x' in ss.suggest_async().result()
+
+# test that the hyperparameters are only resampled every k trials
+def test_refit_every():
+    ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3}},
+                         refit_policy=RefitEvery(5))
+    for n in range(5):
+        suggestion = ss.suggest_random()
+        ss.update(suggestion, squared(**suggestion))
+    for n in range(10):
+        suggestion = ss.suggest()
+        ss.update(suggestion, squared(**suggestion))
+    assert ss.fit_counts['full'] == 2
+    assert ss.fit_counts['cached'] == 8
+
+# test that presets and options are passed on to the chooser and models
+def test_presets():
+    ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3}},
+                         preset='fast', options={'mcmc_iters': 7})
+    assert ss.chooser_options['grid_size'] == 1000
+    assert ss.task_config['main']['mcmc_iters'] == 7
+    ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3}},
+                         preset='adaptive')
+    mcmc_iters = ss.task_config['main']['mcmc_iters']
+    for n in range(50):
+        suggestion = ss.suggest_random()
+        ss.update(suggestion, squared(**suggestion))
+    ss.suggest()
+    assert ss.task_config['main']['mcmc_iters'] < mcmc_iters
+
+# test that random designs are reproducible and within the parameter space
+def test_suggest_random():
+    ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3},
+                          'y': {'type': 'int', 'min': 0, 'max': 3},
+                          'z': {'type': 'enum', 'options': ['a', 'b']}})
+    for method in ['uniform', 'sobol', 'lhs']:
+        suggestions = ss.suggest_random(16, method=method, seed=0)
+        assert suggestions == ss.suggest_random(16, method=method, seed=0)
+        assert all(-3 <= s['x'] <= 3 for s in suggestions)
+        assert all(s['y'] in [0, 1, 2, 3] for s in suggestions)
+        assert all(s['z'] in ['a', 'b'] for s in suggestions)
+    # Latin hypercube samples are stratified along each dimension
+    suggestions = ss.suggest_random(8, method='lhs')
+    assert sorted(s['y'] for s in suggestions) == [0, 0, 1, 1, 2, 2, 3, 3]
+    # Without scipy's qmc module, Sobol designs fall back to Latin hypercubes
+    qmc = sys.modules.get('scipy.stats.qmc')
+    sys.modules['scipy.stats.qmc'] = None
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            assert (ss.suggest_random(8, method='sobol', seed=0) ==
+                    ss.suggest_random(8, method='lhs', seed=0))
+        assert len(caught) == 1
+    finally:
+        if qmc is None:
+            del sys.modules['scipy.stats.qmc']
+        else:
+            sys.modules['scipy.stats.qmc'] = qmc
+
+# test that bulk updates give the same task group as one-by-one updates
+def test_update_many():
+    parameter_space = {'x': {'type': 'float', 'min': -3, 'max': 3},
+                       'y': {'type': 'int', 'min': 0, 'max': 3},
+                       'z': {'type': 'enum', 'options': ['a', 'b']}}
+    ss = SimpleSpearmint(parameter_space)
+    suggestions = ss.suggest_random(50)
+    values = np.random.randn(50)
+    values[::7] = np.nan
+    for suggestion, value in zip(suggestions, values):
+        ss.update(suggestion, value)
+
+    for parameter_values in [
+            suggestions,
+            dict((name, [s[name] for s in suggestions])
+                 for name in parameter_space)]:
+        bulk_ss = SimpleSpearmint(parameter_space)
+        bulk_ss.update_many(parameter_values, values)
+        assert bulk_ss.parameter_values == ss.parameter_values
+        assert np.allclose(bulk_ss.task_group.inputs, ss.task_group.inputs)
+        assert np.allclose(bulk_ss.task_group.values['main'],
+                           ss.task_group.values['main'], equal_nan=True)
+        assert np.all(bulk_ss.task_group.values['NaN'] ==
+                      ss.task_group.values['NaN'])
+
+    try:
+        ss.update_many([{'x': 4, 'y': 0, 'z': 'a'}], [0.])
+        assert False
+    except ValueError:
+        pass
+
+    # Enum options which look like numbers are parsed as such from a .csv
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'trials.csv')
+        with open(path, 'w') as f:
+            f.write('x,z,objective\n1.5,2,0.5\n-1.,10,1.5\n')
+        ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3},
+                              'z': {'type': 'enum',
+                                    'options': ['1', '2', '10']}})
+        ss.update_many(path)
+        assert [s['z'] for s in ss.parameter_values] == ['2', '10']
+    finally:
+        shutil.rmtree(directory)
+
+# test that an optimizer can be resumed from its journal
+def test_resume():
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'journal')
+        ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3},
+                              'y': {'type': 'int', 'min': 0, 'max': 3},
+                              'z': {'type': 'enum', 'options': ['a', 'b']}},
+                             minimize=False, journal=path)
+        for suggestion in ss.suggest_random(5):
+            ss.update(suggestion, suggestion['x'])
+        for n in range(5):
+            suggestion = ss.suggest()
+            ss.update(suggestion, suggestion['x'])
+        # Simulate a crash in the middle of writing a record
+        with open(path, 'ab') as f:
+            f.write(b'\0\0\0')
+
+        resumed = SimpleSpearmint.resume(path)
+        assert resumed.parameter_values == ss.parameter_values
+        assert resumed.objective_values == ss.objective_values
+        assert resumed.get_best_parameters() == ss.get_best_parameters()
+        assert np.allclose(resumed.task_group.inputs, ss.task_group.inputs)
+        assert resumed.hypers is not None
+        # New trials are appended to the same journal
+        suggestion = resumed.suggest()
+        resumed.update(suggestion, suggestion['x'])
+        assert len(SimpleSpearmint.resume(path).parameter_values) == 11
+    finally:
+        shutil.rmtree(directory)
+
+# test that calls are instrumented and passed to the callback
+def test_stats():
+    records = []
+    ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3}},
+                         callback=records.append)
+    for n in range(5):
+        suggestion = ss.suggest()
+        ss.update(suggestion, squared(**suggestion))
+    assert [record['call'] for record in records] == ['suggest', 'update']*5
+    assert list(ss.stats.records) == records
+    assert records[-2]['n_trials'] == 4
+    assert records[-2]['full_fits'] == 1
+    assert 'fit' in records[-2]['phases']
+    assert 'encode' in records[-1]['phases']
+    summary = ss.stats.summary()
+    assert summary['simple_spearmint.suggest.count'] == 5
+    assert summary['simple_spearmint.update.n_trials'] == 4
+
+# test that several studies share one pool and that idle studies are evicted
+def test_study_manager():
+    directory = tempfile.mkdtemp()
+    try:
+        manager = StudyManager(
+            n_workers=2, state_dir=directory, max_resident=1,
+            executor=concurrent.futures.ThreadPoolExecutor(2))
+        for n in range(3):
+            manager.add_study(
+                'study{}'.format(n),
+                {'x': {'type': 'float', 'min': -3, 'max': 3}},
+                squared, n_trials=4, n_initial=2)
+        # A study whose trials all fail doesn't stop the others
+        manager.add_study(
+            'failing', {'x': {'type': 'float', 'min': -3, 'max': 3}},
+            failing, n_trials=2, n_initial=2)
+        best = manager.run()
+        assert sorted(best) == ['study0', 'study1', 'study2']
+        assert sum(study.optimizer is not None
+                   for study in manager.studies.values()) == 1
+        assert len(manager.get_study('failing').objective_values) == 2
+        for n in range(3):
+            ss = manager.get_study('study{}'.format(n))
+            assert len(ss.objective_values) == 4
+            assert not ss.pending_values
+    finally:
+        shutil.rmtree(directory)
+
+# test that concurrent clients share one optimizer through the server
+def test_server():
+    from simple_spearmint.server import SuggestionServer
+    directory = tempfile.mkdtemp()
+    ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3}})
+    server = SuggestionServer(ss, os.path.join(directory, 'socket'))
+    thread = threading.Thread(target=server.run)
+    thread.start()
+    try:
+        server.ready.wait()
+
+        def work(n):
+            with SuggestionClient(server.path) as client:
+                for suggestion in client.suggest_random(2, seed=n):
+                    client.update(suggestion, squared(**suggestion))
+                for _ in range(2):
+                    suggestion = client.suggest()
+                    client.update(suggestion, squared(**suggestion))
+
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            list(executor.map(work, range(4)))
+        assert len(ss.objective_values) == 16
+        assert ss.pending_values == []
+        # The suggestions of clients which disconnect are no longer pending
+        with SuggestionClient(server.path) as client:
+            client.suggest()
+            assert len(ss.pending_values) == 1
+        for _ in range(100):
+            if not ss.pending_values:
+                break
+            time.sleep(.01)
+        assert ss.pending_values == []
+        best_parameters, best_objective = SuggestionClient(
+            server.path).get_best_parameters()
+        assert best_objective == np.min(ss.objective_values)
+    finally:
+        server.stop()
+        thread.join()
+        shutil.rmtree(directory)
+
+def _file_queue_worker(directory):
+    FileQueueWorker(directory).run(squared, poll_interval=.01)
+
+# test that workers in other processes evaluate suggestions from a file queue
+# and that expired leases are reclaimed
+def test_file_queue():
+    directory = tempfile.mkdtemp()
+    try:
+        ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3}})
+        driver = FileQueueDriver(ss, directory, lease=10.)
+        trial_id, = driver.submit()
+        assert FileQueueWorker(directory).claim()[0] == trial_id
+        # Let the claimed trial's lease expire
+        os.utime(os.path.join(directory, 'claimed', trial_id + '.json'),
+                 (0, 0))
+        driver.poll()
+        assert driver.n_reclaimed == 1
+        assert os.listdir(os.path.join(directory, 'pending'))
+
+        workers = [multiprocessing.Process(target=_file_queue_worker,
+                                           args=(directory,))
+                   for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        best_parameters, best_objective = driver.run(12, 3,
+                                                     poll_interval=.01)
+        for worker in workers:
+            worker.join()
+        assert len(ss.objective_values) == 12
+        assert ss.pending_values == []
+        assert best_objective == np.min(ss.objective_values)
+
+        # Suggestions whose lease keeps expiring are given up on
+        driver = FileQueueDriver(ss, directory, lease=10., max_reclaims=1)
+        trial_id, = driver.submit()
+        for _ in range(2):
+            assert FileQueueWorker(directory).claim()[0] == trial_id
+            os.utime(os.path.join(directory, 'claimed', trial_id + '.json'),
+                     (0, 0))
+            driver.poll()
+        assert driver.n_reclaimed == 1
+        assert driver.failures[0][0] == 'expired'
+        assert np.isnan(ss.objective_values[-1])
+        assert ss.pending_values == []
+
+        # Objectives which raise don't stop the workers
+        driver = FileQueueDriver(ss, directory, lease=10.)
+        worker = threading.Thread(
+            target=FileQueueWorker(directory).run, args=(_raises, .01))
+        worker.start()
+        driver.run(2, 2, poll_interval=.01)
+        worker.join()
+        assert len(ss.objective_values) == 15
+        assert np.all(np.isnan(ss.objective_values[-2:]))
+        assert [reason for reason, _, _ in driver.failures] == ['error']*2
+    finally:
+        shutil.rmtree(directory)
+
+# test that the model is fit to a bounded subset of the trials
+def test_max_fit_trials():
+    ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3}},
+                         max_fit_trials=10)
+    for suggestion in ss.suggest_random(30, seed=0):
+        ss.update(suggestion, squared(**suggestion))
+    subset = ss.trials.active_subset(10)
+    assert subset.shape == (10,)
+    assert np.argmin(ss.objective_values) in subset
+    assert 29 in subset
+    ss.suggest()
+    assert ss.stats.records[-1]['active_size'] == 10
+
+# test that the NumPy backend finds the minimum of a simple function
+def test_numpy_backend():
+    ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3},
+                          'n': {'type': 'int', 'min': 0, 'max': 4},
+                          'z': {'type': 'enum', 'options': ['a', 'b']}},
+                         backend='numpy')
+    np.random.seed(0)
+    for suggestion in ss.suggest_random(5, method='lhs'):
+        ss.update(suggestion, squared(suggestion['x']) + suggestion['n'])
+    for suggestion in ss.suggest_batch(2):
+        ss.update(suggestion, squared(suggestion['x']) + suggestion['n'])
+    for n in range(15):
+        suggestion = ss.suggest()
+        ss.update(suggestion, squared(suggestion['x']) + suggestion['n'])
+    best_parameters, best_objective = ss.get_best_parameters()
+    assert best_parameters['n'] == 0
+    assert best_objective < .1
+    assert np.isfinite(ss.predictive_log_likelihood())
+
+# test that repeated parameter values are answered from the cache, or avoided
+# when the objective is noiseless
+def test_cache():
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'cache')
+        parameter_space = {'n': {'type': 'int', 'min': 0, 'max': 3},
+                           'z': {'type': 'enum', 'options': ['a', 'b']}}
+        ss = SimpleSpearmint(parameter_space, noiseless=True, backend='numpy',
+                             cache=EvaluationCache(max_size=4, path=path))
+        for n in range(8):
+            suggestion = ss.suggest()
+            assert ss.lookup(suggestion) is None
+            ss.update(suggestion, suggestion['n'])
+        # All 8 settings have been evaluated exactly once
+        assert len(set(ss.cache.key(row) for row in ss.trials.inputs)) == 8
+        suggestion = ss.suggest()
+        assert ss.lookup(suggestion) == suggestion['n']
+        ss.update(suggestion, suggestion['n'])
+        assert len(ss.objective_values) == 8
+        assert ss.cache.hit_rate == 1/9.
+        ss.cache.close()
+        # Evicted entries are still on disk
+        cache = EvaluationCache(path=path)
+        assert len(cache) == 8
+        cache.close()
+
+        # With a noisy objective, optimize only evaluates each setting once
+        calls = []
+
+        def objective(n, z):
+            calls.append((n, z))
+            return n
+        ss = SimpleSpearmint({'n': {'type': 'int', 'min': 0, 'max': 1}},
+                             backend='numpy', cache=EvaluationCache())
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            ss.optimize(lambda n: objective(n, 'a'), 6, n_workers=1,
+                        executor=executor)
+        assert len(calls) == len(set(calls)) <= 2
+        # Cache hits aren't added as trials again
+        assert len(ss.objective_values) == len(calls)
+        assert ss.pending_values == []
+    finally:
+        shutil.rmtree(directory)
+
+def _unreliable(x):
+    # Hangs, crashes or raises in parts of the space
+    if x > 2:
+        time.sleep(60)
+    elif x < -2:
+        os._exit(1)
+    elif x < -1:
+        raise ValueError(x)
+    return x ** 2
+
+def test_managed_executor():
+    ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3}},
+                         backend='numpy')
+    with ManagedExecutor(3, timeout=1.) as executor:
+        futures = [executor.submit(_unreliable, x=x)
+                   for x in [-2.5, -1.5, 0.5, 2.5]]
+        values = [future.result(10) for future in futures]
+    assert np.isnan(values[:2]).all() and np.isnan(values[3])
+    assert values[2] == .25
+    assert executor.counts == {'crashed': 1, 'error': 1, 'timeout': 1,
+                               'completed': 1}
+    # Timeouts bound the study, and failures are recorded as NaN
+    tic = time.time()
+    ss.optimize(_unreliable, 8, n_workers=4, n_initial=8, timeout=1.)
+    assert time.time() - tic < 10
+    assert len(ss.objective_values) == 8
+    xs = np.array([p['x'] for p in ss.parameter_values])
+    assert np.isnan(ss.objective_values).sum() == np.sum((xs > 2) | (xs < -1))
+
+def test_hyperband():
+    evaluations = []
+
+    def loss(x, budget):
+        return (x - 1) ** 2 + 1. / budget
+
+    def objective(x, budget):
+        evaluations.append((x, budget))
+        return loss(x, budget)
+    ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3},
+                          'budget': {'type': 'int', 'min': 1, 'max': 9}},
+                         backend='numpy')
+    hyperband = Hyperband(ss, 'budget', eta=3)
+    best_parameters, best_objective = hyperband.run(objective, n_brackets=2)
+    # 9 configurations at budget 1, 3 at 3 and 1 at 9, then 5 at 3 and 1 at 9
+    budgets = [budget for _, budget in evaluations]
+    assert budgets == [1]*9 + [3]*3 + [9] + [3]*5 + [9]
+    assert len(ss.objective_values) == len(evaluations)
+    assert not ss.pending_values
+    # Only the best configuration of each rung was promoted
+    rung = sorted(evaluations[:9], key=lambda e: loss(*e))
+    assert sorted(x for x, _ in evaluations[9:12]) == sorted(
+        x for x, _ in rung[:3])
+    assert best_parameters['budget'] == 9
+    assert best_objective == min(loss(x, 9) for x, budget in
+                                 evaluations if budget == 9)
+
+    # Failed evaluations are never promoted, so the next rung shrinks
+    evaluations = []
+
+    def failing_objective(x, budget):
+        evaluations.append((x, budget))
+        if budget == 1 and len(evaluations) > 2:
+            return np.nan
+        return loss(x, budget)
+    ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3},
+                          'budget': {'type': 'int', 'min': 1, 'max': 9}},
+                         backend='numpy')
+    hyperband = Hyperband(ss, 'budget', eta=3)
+    hyperband.run(failing_objective, n_brackets=1)
+    budgets = [budget for _, budget in evaluations]
+    assert budgets == [1]*9 + [3]*2 + [9]
+    assert sorted(x for x, _ in evaluations[9:11]) == sorted(
+        x for x, _ in evaluations[:2])
+    # A bracket whose evaluations all fail ends early
+    evaluations = []
+    hyperband = Hyperband(ss, 'budget', eta=3)
+    while True:
+        trial = hyperband.suggest(new_bracket=not evaluations)
+        if trial is None:
+            break
+        trial_id, parameters = trial
+        evaluations.append(parameters)
+        hyperband.update(trial_id, np.nan)
+    assert [p['budget'] for p in evaluations] == [1]*9
+    assert not hyperband.brackets
+    assert not ss.pending_values
+
+def test_parallel_chains():
+    with SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3}},
+                         backend=SpearmintBackend(n_chains=2),
+                         options={'mcmc_iters': 10}) as ss:
+        for suggestion in ss.suggest_random(3, seed=0):
+            ss.update(suggestion, squared(**suggestion))
+        for n in range(3):
+            suggestion = ss.suggest()
+            ss.update(suggestion, squared(**suggestion))
+            # The GP averages over the samples of both chains
+            model = ss.chooser.models['main']
+            assert len(model._hypers_list) == model.num_states == 10
+            assert ss.stats.records[-2]['n_chains'] == 2
+        # The fantasies of pending trials are rebuilt for the merged samples
+        ss.add_pending(ss.suggest_random())
+        ss._fit(True)
+        model = ss.chooser.models['main']
+        assert len(model._hypers_list) == model.num_states == 10
+        assert len(model._fantasy_values_list) == 10
+    # The process pool which the backend created is shut down on exit
+    assert ss.backend.executor is None
+
+def test_history():
+    ss = SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3},
+                          'n': {'type': 'int', 'min': 0, 'max': 3},
+                          'f': {'type': 'enum', 'options': ['sin', 'cos']}},
+                         minimize=False)
+    suggestions = ss.suggest_random(20, seed=0)
+    values = [negative_squared(s['x']) + s['n'] for s in suggestions]
+    values[3] = np.nan
+    for suggestion, value in zip(suggestions[:10], values[:10]):
+        ss.update(suggestion, value)
+    ss.update_many(suggestions[10:], values[10:])
+    order = np.argsort(np.where(np.isnan(values), np.inf,
+                               -np.array(values)), kind='mergesort')
+    assert ss.get_best_parameters() == (suggestions[order[0]],
+                                        values[order[0]])
+    assert ss.top_k(3) == [(suggestions[i], values[i]) for i in order[:3]]
+    records = ss.history.records
+    assert records.dtype['n'].kind == records.dtype['f'].kind == 'i'
+    assert np.all(records['n'] == [s['n'] for s in suggestions])
+    assert np.all(records['f'] == [['sin', 'cos'].index(s['f'])
+                                   for s in suggestions])
+    best_so_far = np.fmax.accumulate(values)
+    assert np.allclose(ss.history.best_so_far, best_so_far)
+    assert np.allclose(ss.history.regret(3), 3 - best_so_far)
+
+def test_chunked_acquisition():
+    suggestions = []
+    for n_workers in [1, 3]:
+        np.random.seed(0)
+        with SimpleSpearmint({'x': {'type': 'float', 'min': -3, 'max': 3},
+                              'n': {'type': 'int', 'min': 0, 'max': 3}},
+                             backend=NumpyBackend(chunk_size=300,
+                                                  n_workers=n_workers),
+                             options={'grid_size': 1000}) as ss:
+            for suggestion in ss.suggest_random(5, seed=0):
+                ss.update(suggestion,
+                          squared(suggestion['x']) + suggestion['n'])
+            suggestions.append(ss.suggest())
+        assert ss.backend._executor is None
+    # The candidates don't depend on how the chunks are scheduled
+    assert suggestions[0] == suggestions[1]
+    assert ss.stats.records[-1]['grid_size'] == 1000
+
+def test_warm_start():
+    directory = tempfile.mkdtemp()
+    try:
+        journal = os.path.join(directory, 'journal')
+        prior = SimpleSpearmint(
+            {'x': {'type': 'float', 'min': -3, 'max': 3},
+             'f': {'type': 'enum', 'options': ['sin', 'cos', 'tan']}},
+            backend='numpy', journal=journal)
+        suggestions = prior.suggest_random(10, seed=0)
+        values = [squared(s['x']) for s in suggestions]
+        prior.update_many(suggestions, values)
+        prior.suggest()
+        # Different enum options and a narrower range; the order of the
+        # parameters doesn't matter either
+        space = collections.OrderedDict(
+            [('f', {'type': 'enum', 'options': ['cos', 'sin']}),
+             ('x', {'type': 'float', 'min': -2, 'max': 3})])
+        expected = [s for s in suggestions if s['f'] != 'tan' and
+                    s['x'] >= -2]
+        expected.sort(key=lambda s: squared(s['x']))
+        for source in [prior, journal]:
+            ss = SimpleSpearmint(copy.deepcopy(space), backend='numpy')
+            ss.warm_start(source, top_k=2, observations=True, weight=.2)
+            # The prior's lengthscales of x, sin, cos and tan are mapped to
+            # cos, sin and x, rescaled to the narrower range of x
+            theta = prior.hypers['theta']
+            ss._fit(False)
+            posterior = ss.backend._posterior
+            assert np.allclose(np.log(posterior['lengthscales']),
+                               [theta[2], theta[1],
+                                theta[0] + np.log(6/5.)])
+            assert np.allclose(np.log(posterior['amplitude']), theta[4])
+            assert ss.auxiliary['codes'].shape == (len(expected), 2)
+            assert np.allclose(ss.auxiliary['noise'], 4.)
+            # The best prior configurations are suggested first
+            for s in expected[:2]:
+                suggestion = ss.suggest()
+                assert suggestion == s
+                ss.update(suggestion, squared(s['x']))
+            assert not ss.queued_values
+            assert -2 <= ss.suggest()['x'] <= 3
+        # suggest_async and StudyManager hand out the queued values too
+        ss = SimpleSpearmint(copy.deepcopy(space), backend='numpy')
+        ss.warm_start(prior, top_k=2)
+        queued = [ss.suggest_async().result() for _ in range(2)]
+        assert queued == expected[:2]
+        assert not ss.queued_values
+        assert -2 <= ss.suggest_async().result()['x'] <= 3
+        ss.close()
+        manager = StudyManager(
+            n_workers=2, executor=concurrent.futures.ThreadPoolExecutor(2))
+        manager.add_study('warm', copy.deepcopy(space),
+                          lambda x, f: squared(x), n_trials=3,
+                          backend='numpy')
+        manager.get_study('warm').warm_start(prior, top_k=2)
+        manager.run()
+        ss = manager.get_study('warm')
+        assert ss.parameter_values[:2] == expected[:2]
+        assert len(ss.parameter_values) == 3
+        ss = SimpleSpearmint(copy.deepcopy(space))
+        try:
+            ss.warm_start(prior, observations=True)
+            assert False
+        except ValueError:
+            pass
+    finally:
+        shutil.rmtree(directory)
+
+    # Reordered parameters keep their own hyperparameters with the NumPy
+    # backend, and Spearmint's are only reused for identical spaces
+    space = collections.OrderedDict(
+        [('a', {'type': 'float', 'min': 0, 'max': 1}),
+         ('b', {'type': 'float', 'min': 0, 'max': 1})])
+    reordered = collections.OrderedDict(reversed(list(space.items())))
+    prior = SimpleSpearmint(copy.deepcopy(space), backend='numpy')
+    prior.hypers = {'theta': np.log([.1, 2., 1., 1e-3])}
+    ss = SimpleSpearmint(copy.deepcopy(reordered), backend='numpy')
+    ss.warm_start(prior)
+    assert np.allclose(ss.hypers['theta'], np.log([2., .1, 1., 1e-3]))
+    prior = SimpleSpearmint(copy.deepcopy(space))
+    prior.hypers = {'main': {'hypers': {'ls': np.array([.1, 2.])}}}
+    ss = SimpleSpearmint(copy.deepcopy(reordered))
+    ss.warm_start(prior)
+    assert ss.hypers is None
+    ss = SimpleSpearmint(copy.deepcopy(space))
+    ss.warm_start(prior)
+    assert ss.hypers is prior.hypers
+
 if __name__ == '__main__':
-    test_maximize()
\ No newline at end of file
+    test_maximize()
+    test_incremental_update()
+    test_suggest_batch()
+    test_optimize()
+    test_optimize_error()
+    test_pipeline()
+    test_refit_every()
+    test_presets()
+    test_suggest_random()
+    test_update_many()
+    test_resume()
+    test_stats()
+    test_study_manager()
+    test_server()
+    test_file_queue()
+    test_max_fit_trials()
+    test_numpy_backend()
+    test_cache()
+    test_managed_executor()
+    test_hyperband()
+    test_parallel_chains()
+    test_history()
+    test_chunked_acquisition()
+    test_warm_start()